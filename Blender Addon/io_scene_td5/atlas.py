@@ -0,0 +1,128 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+# UVs this far outside 0-1 still count as inside, for rounding
+UV_EPSILON = 1e-3
+
+######################################################
+# ATLAS
+######################################################
+@dataclass
+class TextureAtlas:
+    """Equally sized textures packed into a few pages, images are top row first"""
+    pages: list
+    page_size: int
+    tile_size: int
+    padding: int
+    placements: dict
+
+    def tile_origin(self, texnum):
+        # (page, x, y) of the top left texel of a texture
+        return self.placements[texnum]
+
+
+def build_atlas(textures, page_size=1024, padding=2):
+    # textures is {texture number: (size, size, 4) RGBA bytes}. each tile is
+    # surrounded by copies of its edge texels so filtering doesn't pull in
+    # the neighbouring textures
+    texnums = sorted(textures)
+    if len(texnums) == 0:
+        return TextureAtlas(pages=[], page_size=page_size, tile_size=0, padding=padding, placements={})
+
+    tile_size = textures[texnums[0]].shape[0]
+    stride = tile_size + padding * 2
+    per_row = max(1, page_size // stride)
+    per_page = per_row * per_row
+
+    pages = []
+    placements = {}
+    for i, texnum in enumerate(texnums):
+        page, slot = divmod(i, per_page)
+        if page == len(pages):
+            pages.append(np.zeros((page_size, page_size, 4), dtype=np.uint8))
+
+        x = (slot % per_row) * stride
+        y = (slot // per_row) * stride
+        pages[page][y:y + stride, x:x + stride] = np.pad(textures[texnum], ((padding, padding), (padding, padding), (0, 0)), mode='edge')
+        placements[texnum] = (page, x + padding, y + padding)
+
+    return TextureAtlas(pages=pages,
+                        page_size=page_size,
+                        tile_size=tile_size,
+                        padding=padding,
+                        placements=placements)
+
+######################################################
+# GEOMETRY
+######################################################
+def loop_texture_numbers(geom):
+    # texture number of the face each loop belongs to
+    slot_textures = np.array(list(geom.materials) + [-1], dtype=np.int64)
+    return slot_textures[np.repeat(geom.face_materials, geom.face_sizes)]
+
+
+def repeating_textures(geoms):
+    # texture numbers used with UVs outside 0-1, which rely on the texture
+    # repeating and so can't go into an atlas
+    repeating = set()
+    for geom in geoms:
+        if geom.loop_uvs is None or len(geom.loop_uvs) == 0:
+            continue
+        outside = ((geom.loop_uvs < -UV_EPSILON) | (geom.loop_uvs > 1 + UV_EPSILON)).any(axis=1)
+        repeating.update(np.unique(loop_texture_numbers(geom)[outside]).tolist())
+    repeating.discard(-1)
+    return repeating
+
+
+def apply_atlas(geom, atlas, page_materials):
+    # returns a copy of geom with atlased material slots swapped for their
+    # page's material and their UVs moved into the page. page_materials is
+    # the material id to use for each page
+    if geom.loop_uvs is None:
+        return geom
+
+    slot_textures = list(geom.materials)
+    new_materials = {}
+    slot_remap = []
+    for texnum in slot_textures:
+        material = page_materials[atlas.placements[texnum][0]] if texnum in atlas.placements else texnum
+        slot_remap.append(new_materials.setdefault(material, len(new_materials)))
+    slot_remap = np.array(slot_remap + [0], dtype=np.int32)
+
+    # per slot scale and offset, in page UV space
+    scale = np.ones(len(slot_textures) + 1, dtype=np.float64)
+    offset_u = np.zeros(len(slot_textures) + 1, dtype=np.float64)
+    offset_v = np.zeros(len(slot_textures) + 1, dtype=np.float64)
+    atlased = np.zeros(len(slot_textures) + 1, dtype=bool)
+    for slot, texnum in enumerate(slot_textures):
+        if texnum in atlas.placements:
+            _, x, y = atlas.placements[texnum]
+            scale[slot] = atlas.tile_size / atlas.page_size
+            offset_u[slot] = x / atlas.page_size
+            offset_v[slot] = y / atlas.page_size
+            atlased[slot] = True
+
+    loop_slots = np.repeat(geom.face_materials, geom.face_sizes)
+    moved = atlased[loop_slots]
+    uvs = geom.loop_uvs.astype(np.float64)
+    slots = loop_slots[moved]
+
+    # V runs bottom up in Blender but pages are stored top row first
+    loop_uvs = geom.loop_uvs.copy()
+    loop_uvs[moved, 0] = offset_u[slots] + uvs[moved, 0] * scale[slots]
+    loop_uvs[moved, 1] = 1 - (offset_v[slots] + (1 - uvs[moved, 1]) * scale[slots])
+
+    return replace(geom,
+                   materials=list(new_materials),
+                   face_materials=slot_remap[geom.face_materials],
+                   loop_uvs=loop_uvs)
@@ -0,0 +1,174 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Level imports that run a few models at a time from a modal timer, so
+# Blender stays usable while a level streams in. The import itself is a
+# generator yielding (steps done, step count), see level_steps in
+# import_td5dat and import_td6level
+
+import bpy
+import logging, time
+
+from bpy.app.handlers import persistent
+from bpy_extras.io_utils import ImportHelper
+
+from . import profiling
+
+log = logging.getLogger(__name__)
+
+# seconds of importing per timer event, and seconds between events
+SLICE_SECONDS = 0.05
+TIMER_INTERVAL = 0.01
+
+# operators with an import in progress
+running = []
+
+######################################################
+# HANDLERS
+######################################################
+@persistent
+def abort_running(*args):
+    # undo, redo and loading a file replace the data being imported into,
+    # imports in progress stop without touching it again
+    for operator in running:
+        operator.aborted = True
+
+
+def register_handlers():
+    for handlers in (bpy.app.handlers.undo_pre, bpy.app.handlers.redo_pre, bpy.app.handlers.load_pre):
+        handlers.append(abort_running)
+
+
+def unregister_handlers():
+    for handlers in (bpy.app.handlers.undo_pre, bpy.app.handlers.redo_pre, bpy.app.handlers.load_pre):
+        if abort_running in handlers:
+            handlers.remove(abort_running)
+    for operator in list(running):
+        operator.aborted = True
+
+
+def available(context):
+    # modal operators need a window to receive events in
+    return not bpy.app.background and context.window is not None
+
+######################################################
+# OPERATOR
+######################################################
+class TimeSlicedImport:
+    """Mixin for operators that run a level import generator from a modal timer"""
+
+    def invoke(self, context, event):
+        # only imports started from the UI run in the background, scripts
+        # calling the operator get every object before it returns
+        self.invoked = True
+        return ImportHelper.invoke(self, context, event)
+
+    def in_background(self, context):
+        return getattr(self, "invoked", False) and available(context)
+
+    def start_steps(self, context, settings, steps, link_textures):
+        # link_textures(), called when the import is stopped early, links
+        # textures for the models imported so far. the first step runs
+        # right away so bad input raises from execute like it always has
+        self.steps = steps
+        self.link_textures = link_textures
+        self.aborted = False
+        self.progress = (0, 1)
+        self.run = profiling.OperatorRun(context, self.bl_idname, settings)
+        self.time1 = time.perf_counter()
+
+        if not self.step(context, 0.0):
+            return self.finish(context)
+
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(TIMER_INTERVAL, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        running.append(self)
+        self.show_progress(context)
+        return {'RUNNING_MODAL'}
+
+    def step(self, context, seconds):
+        # runs the import for about the given seconds, at least one step.
+        # returns whether there's more to do
+        deadline = time.perf_counter() + seconds
+        with self.run.slice():
+            try:
+                while True:
+                    self.progress = next(self.steps)
+                    if time.perf_counter() >= deadline:
+                        return True
+            except StopIteration:
+                return False
+            except Exception as e:
+                error = e
+
+        self.stop(context)
+        self.run.finish(str(error))
+        raise error
+
+    def show_progress(self, context):
+        done, step_count = self.progress
+        context.window_manager.progress_update(int(100 * done / max(step_count, 1)))
+        context.workspace.status_text_set("Importing level: %d%%, press Esc to stop" % (100 * done // max(step_count, 1)))
+
+    def stop(self, context):
+        # leaves modal mode, the steps generator is closed which releases
+        # the files it has open
+        self.steps.close()
+        if self in running:
+            running.remove(self)
+            wm = context.window_manager
+            wm.event_timer_remove(self.timer)
+            wm.progress_end()
+            context.workspace.status_text_set(None)
+
+    def finish(self, context):
+        self.stop(context)
+        self.run.finish()
+        seconds = time.perf_counter() - self.time1
+        log.info("Level import complete in %.4f sec., %.4f sec. of it importing" % (seconds, self.run.seconds))
+        self.report({'INFO'}, "Level imported in %.2f sec." % seconds)
+        return {'FINISHED'}
+
+    def modal(self, context, event):
+        if self.aborted:
+            self.stop(context)
+            self.run.finish("aborted")
+            self.report({'WARNING'}, "Level import aborted by undo or file load")
+            return {'CANCELLED'}
+
+        if event.type == 'ESC' and event.value == 'PRESS':
+            # keep what was imported so far, with its textures
+            self.stop(context)
+            with self.run.slice():
+                self.link_textures()
+            self.run.finish("stopped")
+            done, step_count = self.progress
+            log.info("Level import stopped at %d of %d steps" % (done, step_count))
+            self.report({'WARNING'}, "Level import stopped, the models imported so far were kept")
+            return {'FINISHED'}
+
+        if event.type == 'TIMER':
+            try:
+                more = self.step(context, SLICE_SECONDS)
+            except Exception as e:
+                self.report({'ERROR'}, "Level import failed: %s" % e)
+                return {'CANCELLED'}
+            if not more:
+                return self.finish(context)
+            self.show_progress(context)
+
+        return {'PASS_THROUGH'}
+
+    def cancel(self, context):
+        # called when Blender ends the operator, e.g. on quit
+        self.aborted = True
+        self.stop(context)
+        self.run.finish("aborted")
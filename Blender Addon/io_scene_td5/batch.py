@@ -0,0 +1,179 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Headless batch export to TD5 .dat, run through Blender:
+#
+#   blender --background --python io_scene_td5/batch.py -- --blend cars.blend --match "*Body*" --output out
+#
+# or with the add-on installed:
+#
+#   blender --background --python-expr "from io_scene_td5 import batch; batch.main()" -- ...
+#
+# Every mesh object matching --collection / --match in each .blend is written
+# to <output>/<object name>.dat, or <output>/<blend name>/<object name>.dat
+# when more than one .blend is given. --jobs N splits the objects over N
+# Blender processes. A JSON summary is written to --summary, by default
+# <output>/export_summary.json
+
+import bpy
+import argparse, fnmatch, os, re, sys, time
+
+if __package__:
+    from . import export_td5dat, utils
+
+######################################################
+# HELPERS
+######################################################
+def parse_args(argv):
+    parser = utils.script_parser("io_scene_td5.batch", "Export mesh objects to Test Drive 5 .dat files", "directory to write .dat files to")
+    parser.add_argument("--blend", nargs='+', default=[], help=".blend files to export from, defaults to the open file")
+    parser.add_argument("--collection", default=None, help="only export objects in this collection")
+    parser.add_argument("--match", default="*", help="only export objects whose name matches this glob")
+    parser.add_argument("--objects", nargs='+', default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--no-modifiers", dest="apply_modifiers", action="store_false", help="export without applying modifiers")
+    parser.add_argument("--keep-quads", action="store_true", help="write flat, convex quads as quads")
+    return utils.parse_script_args(parser, argv)
+
+
+def export_filename(name):
+    # object names can hold characters that aren't allowed in file names
+    return re.sub(r'[\\/:*?"<>|]', "_", name) + ".dat"
+
+
+def find_objects(collection_name, match, names=None):
+    if collection_name is not None:
+        collection = bpy.data.collections.get(collection_name)
+        if collection is None:
+            raise Exception("Collection %r not found" % collection_name)
+        objects = collection.all_objects
+    else:
+        objects = bpy.data.objects
+
+    if names is not None:
+        names = set(names)
+        return [ob for ob in objects if ob.type == 'MESH' and ob.name in names]
+    return sorted((ob for ob in objects if ob.type == 'MESH' and fnmatch.fnmatchcase(ob.name, match)), key=lambda ob: ob.name)
+
+
+def open_blend(blend):
+    if blend is not None and os.path.abspath(blend) != os.path.abspath(bpy.data.filepath or ""):
+        bpy.ops.wm.open_mainfile(filepath=blend)
+
+
+def output_directory(args, blend):
+    if len(args.blend) > 1:
+        return os.path.join(args.output, os.path.splitext(os.path.basename(blend))[0])
+    return args.output
+
+######################################################
+# EXPORT
+######################################################
+def export_blend(args, blend, names=None):
+    # exports from one .blend in this process, returns the summary entries
+    open_blend(blend)
+    out_dir = output_directory(args, blend or bpy.data.filepath)
+    os.makedirs(out_dir, exist_ok=True)
+
+    objects = find_objects(args.collection, args.match, names)
+    depsgraph = bpy.context.evaluated_depsgraph_get() if args.apply_modifiers else None
+
+    results = []
+    for ob in objects:
+        filepath = os.path.join(out_dir, export_filename(ob.name))
+        entry = {"blend": blend or bpy.data.filepath, "object": ob.name, "path": filepath, "triangles": 0, "quads": 0, "seconds": 0.0, "error": None}
+
+        time1 = time.perf_counter()
+        try:
+            with open(filepath, 'wb') as file:
+                entry["triangles"], entry["quads"] = export_td5dat.export_object(file, ob, args.apply_modifiers, depsgraph, args.keep_quads)
+        except Exception as e:
+            entry["error"] = str(e)
+        entry["seconds"] = time.perf_counter() - time1
+
+        print("%s: %s" % (ob.name, entry["error"] or "%d triangles, %d quads in %.4f sec." % (entry["triangles"], entry["quads"], entry["seconds"])))
+        results.append(entry)
+    return results
+
+
+def split_jobs(args, blends):
+    # opens each .blend to list its objects, then deals them out into
+    # roughly equal (blend, names) jobs
+    work = []
+    for blend in blends:
+        open_blend(blend)
+        names = [ob.name for ob in find_objects(args.collection, args.match)]
+        work += [(blend, name) for name in names]
+
+    chunk_size = max(1, -(-len(work) // args.jobs))
+    jobs = []
+    for i in range(0, len(work), chunk_size):
+        chunk = work[i:i + chunk_size]
+        for blend in dict.fromkeys(blend for blend, _ in chunk):
+            jobs.append((blend, [name for b, name in chunk if b == blend]))
+    return jobs
+
+
+def run_jobs(args, blends):
+    # one Blender process per job, each writes its own summary
+    def job_args(i, job, temp_dir):
+        blend, names = job
+        job_args = ["--blend", blend, "--objects", *names, "--output", output_directory(args, blend)]
+        if args.collection is not None:
+            job_args += ["--collection", args.collection]
+        if not args.apply_modifiers:
+            job_args.append("--no-modifiers")
+        if args.keep_quads:
+            job_args.append("--keep-quads")
+        return job_args
+
+    def failed_entries(job, message):
+        blend, names = job
+        return [{"blend": blend, "object": name, "path": None, "triangles": 0, "quads": 0, "seconds": 0.0, "error": message} for name in names]
+
+    return utils.run_jobs(bpy.app.binary_path, __file__, split_jobs(args, blends), job_args, "objects", failed_entries)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv if argv is None else argv)
+    blends = [os.path.abspath(blend) for blend in args.blend]
+    args.blend = blends
+
+    time1 = time.perf_counter()
+    if args.jobs > 1 and args.objects is None:
+        if len(blends) == 0 and not bpy.data.filepath:
+            raise Exception("--jobs needs a saved .blend file")
+        results = run_jobs(args, blends or [bpy.data.filepath])
+    else:
+        results = []
+        for blend in blends or [None]:
+            results += export_blend(args, blend, args.objects)
+
+    failed = sum(1 for entry in results if entry["error"] is not None)
+    summary = {
+        "objects": results,
+        "exported": len(results) - failed,
+        "failed": failed,
+        "triangles": sum(entry["triangles"] for entry in results),
+        "quads": sum(entry["quads"] for entry in results),
+        "seconds": time.perf_counter() - time1,
+    }
+
+    utils.write_summary(args.summary or os.path.join(args.output, "export_summary.json"), summary)
+
+    print("Exported %d objects, %d failed, in %.4f sec." % (summary["exported"], failed, summary["seconds"]))
+    return 1 if failed > 0 else 0
+
+
+if __name__ == "__main__":
+    if not __package__:
+        # run as a script, import through the add-on package instead
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from io_scene_td5 import batch
+        sys.exit(batch.main())
+    sys.exit(main())
@@ -0,0 +1,265 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Headless conversion of a whole TD5, TD6 or Off-Road 3 install, run through
+# Blender:
+#
+#   blender --background --python io_scene_td5/convert.py -- --install "C:/Games/TD6" --output out --format gltf --jobs 4
+#
+# or with the add-on installed:
+#
+#   blender --background --python-expr "from io_scene_td5 import convert; convert.main()" -- ...
+#
+# Levels (directories with a levelinf.dat, or a models folder for TD6) and
+# loose models (.dat, .prr, .dmp, .mp) are each converted to one .blend or
+# .glb, mirroring the install's folder layout under --output. Outputs newer
+# than all of their sources are skipped, so an interrupted run picks up
+# where it left off. --jobs N converts over N Blender processes, and a JSON
+# summary is written to --summary, by default <output>/convert_summary.json
+
+import argparse, json, os, struct, sys, time
+
+try:
+    import bpy
+except ImportError:
+    # finding items works without Blender, converting them doesn't
+    bpy = None
+
+if __package__:
+    from . import utils
+    from .formats import archive, td5, td6
+    if bpy is not None:
+        from . import import_td5dat, import_td6dat, import_td6level, import_tdo3dat
+
+FORMAT_EXTENSIONS = {'BLEND': ".blend", 'GLTF': ".glb"}
+
+######################################################
+# HELPERS
+######################################################
+def parse_args(argv):
+    parser = utils.script_parser("io_scene_td5.convert", "Convert a Test Drive install to .blend or glTF", "directory to write converted files to")
+    parser.add_argument("--install", required=True, help="game install directory to walk")
+    parser.add_argument("--format", type=str.upper, choices=sorted(FORMAT_EXTENSIONS), default='BLEND', help="output format")
+    parser.add_argument("--force", action="store_true", help="convert everything, even outputs that are up to date")
+    parser.add_argument("--items", default=None, help=argparse.SUPPRESS)
+    return utils.parse_script_args(parser, argv)
+
+
+def model_magic(filepath):
+    with open(filepath, 'rb') as file:
+        header = file.read(2)
+    return struct.unpack('<H', header)[0] if len(header) == 2 else None
+
+
+def archive_model_magic(filepath):
+    # magic of the first model in a models.dat, TD5 and TD6 levels pack
+    # their models the same way
+    try:
+        with archive.ModelsArchive(filepath) as models:
+            if len(models) == 0:
+                return None
+            header = bytes(models.model(0)[:2])
+        return struct.unpack('<H', header)[0] if len(header) == 2 else None
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def directory_files(directory):
+    if not os.path.isdir(directory):
+        return []
+    return [entry.path for entry in os.scandir(directory) if entry.is_file()]
+
+######################################################
+# DISCOVERY
+######################################################
+def find_items(install_dir, output_dir, extension):
+    # returns every convertible item under install_dir as a dict of kind,
+    # source (what gets imported), sources (what the output depends on)
+    # and output
+    items = []
+
+    def add(kind, source, sources, name):
+        output = os.path.join(output_dir, name + extension)
+        items.append({"kind": kind, "source": source, "sources": sources, "output": output})
+
+    for root, dirs, files in os.walk(install_dir):
+        dirs.sort()
+        relative_root = os.path.relpath(root, install_dir)
+        lower_files = {name.lower(): name for name in files}
+
+        # levels, their folders are converted as a whole. td5unpack'd TD6
+        # levels have a models folder, packed TD5 and TD6 levels are read
+        # straight from models.dat and told apart by its first model
+        level_name = relative_root if relative_root != "." else os.path.basename(install_dir)
+        models_dir = os.path.join(root, "models")
+        if "models" in dirs and any(name.endswith(".dat") for name in os.listdir(models_dir)):
+            sources = directory_files(models_dir) + directory_files(os.path.join(root, "textures"))
+            add("td6_level", root, sources, level_name)
+            dirs[:] = []
+            continue
+
+        if "levelinf.dat" in lower_files and "models.dat" in lower_files:
+            sources = directory_files(root) + directory_files(os.path.join(root, "textures"))
+            if archive_model_magic(os.path.join(root, lower_files["models.dat"])) == td6.MODEL_MAGIC:
+                add("td6_level", root, sources, level_name)
+            else:
+                add("td5_level", os.path.join(root, lower_files["levelinf.dat"]), sources, level_name)
+            dirs[:] = []
+            continue
+
+        # loose models
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            relative = os.path.normpath(os.path.join(relative_root, os.path.splitext(name)[0]))
+            lower = name.lower()
+
+            if lower.endswith(".dmp"):
+                add("tdo3_model", path, [path], relative)
+            elif lower.endswith(".mp"):
+                add("tdo3_model", path, [path] + [os.path.join(root, f) for l, f in lower_files.items() if l == "textures.ref"], relative)
+            elif lower.endswith(".dat") or lower.endswith(".prr"):
+                magic = model_magic(path)
+                if magic == td5.MODEL_MAGIC and lower.endswith(".dat"):
+                    add("td5_model", path, [path], relative)
+                elif magic == td6.MODEL_MAGIC:
+                    add("td6_model", path, [path], relative)
+
+    return items
+
+
+def is_up_to_date(item):
+    if not os.path.isfile(item["output"]):
+        return False
+    output_time = os.path.getmtime(item["output"])
+    return all(os.path.getmtime(source) <= output_time for source in item["sources"])
+
+######################################################
+# CONVERSION
+######################################################
+def import_item(item, context):
+    kind = item["kind"]
+    source = item["source"]
+
+    if kind == "td5_level":
+        import_td5dat.load_dat(source, context)
+        for strip_name in ("strip.dat", "stripb.dat"):
+            strip_path = os.path.join(os.path.dirname(source), strip_name)
+            if os.path.isfile(strip_path):
+                import_td5dat.load_dat(strip_path, context)
+    elif kind == "td6_level":
+        import_td6level.load_level(source, context)
+    elif kind == "td5_model":
+        import_td5dat.load_dat(source, context)
+    elif kind == "td6_model":
+        import_td6dat.load_dat(source, context, False)
+    elif kind == "tdo3_model":
+        import_tdo3dat.load_model(source, context)
+
+
+def save_output(filepath, output_format):
+    # a partial output would look up to date to the next run
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with utils.atomic_path(filepath) as temp_path:
+        if output_format == 'GLTF':
+            bpy.ops.export_scene.gltf(filepath=temp_path, export_format='GLB')
+        else:
+            bpy.ops.wm.save_as_mainfile(filepath=temp_path, copy=True)
+
+
+def convert_items(items, output_format):
+    # converts items one after another in this process, each into an empty scene
+    results = []
+    for item in items:
+        entry = {"kind": item["kind"], "source": item["source"], "output": item["output"], "seconds": 0.0, "error": None}
+        print("Converting %s..." % item["source"])
+
+        time1 = time.perf_counter()
+        try:
+            bpy.ops.wm.read_factory_settings(use_empty=True)
+            import_item(item, bpy.context)
+            save_output(item["output"], output_format)
+        except Exception as e:
+            entry["error"] = str(e)
+        entry["seconds"] = time.perf_counter() - time1
+
+        print(" %s" % (entry["error"] or "done in %.4f sec." % entry["seconds"]))
+        results.append(entry)
+    return results
+
+
+def split_jobs(items, job_count):
+    # biggest items first, dealt round robin so each process gets a mix of
+    # levels and small models
+    def item_size(item):
+        return sum(os.path.getsize(source) for source in item["sources"])
+
+    jobs = [[] for _ in range(job_count)]
+    for i, item in enumerate(sorted(items, key=item_size, reverse=True)):
+        jobs[i % job_count].append(item)
+    return [job for job in jobs if len(job) > 0]
+
+
+def run_jobs(args, items):
+    # one Blender process per job, items go through a json file
+    def job_args(i, job, temp_dir):
+        items_path = os.path.join(temp_dir, "job_%03d_items.json" % i)
+        with open(items_path, 'w') as file:
+            json.dump(job, file)
+        return ["--install", args.install, "--output", args.output, "--format", args.format, "--items", items_path]
+
+    def failed_entries(job, message):
+        return [{"kind": item["kind"], "source": item["source"], "output": item["output"], "seconds": 0.0, "error": message} for item in job]
+
+    return utils.run_jobs(bpy.app.binary_path, __file__, split_jobs(items, args.jobs), job_args, "items", failed_entries)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv if argv is None else argv)
+    args.install = os.path.abspath(args.install)
+    args.output = os.path.abspath(args.output)
+
+    time1 = time.perf_counter()
+    skipped = 0
+    if args.items is not None:
+        # a worker process started by run_jobs
+        with open(args.items) as file:
+            results = convert_items(json.load(file), args.format)
+    else:
+        items = find_items(args.install, args.output, FORMAT_EXTENSIONS[args.format])
+        pending = items if args.force else [item for item in items if not is_up_to_date(item)]
+        skipped = len(items) - len(pending)
+        print("Found %d items, %d up to date" % (len(items), skipped))
+
+        if args.jobs > 1 and len(pending) > 1:
+            results = run_jobs(args, pending)
+        else:
+            results = convert_items(pending, args.format)
+
+    failed = sum(1 for entry in results if entry["error"] is not None)
+    summary = {
+        "items": results,
+        "converted": len(results) - failed,
+        "skipped": skipped,
+        "failed": failed,
+        "seconds": time.perf_counter() - time1,
+    }
+
+    utils.write_summary(args.summary or os.path.join(args.output, "convert_summary.json"), summary)
+
+    print("Converted %d items, %d skipped, %d failed, in %.4f sec." % (summary["converted"], skipped, failed, summary["seconds"]))
+    return 1 if failed > 0 else 0
+
+
+if __name__ == "__main__":
+    if not __package__:
+        # run as a script, import through the add-on package instead
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from io_scene_td5 import convert
+        sys.exit(convert.main())
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import concurrent.futures
+import multiprocessing
+
+from . import geometry
+from .formats import archive, td5
+
+######################################################
+# MODEL DECODING
+######################################################
+def decode_td5_model(data, weld_tolerance=0.0):
+    # returns (geometry, location), location is only set for billboards
+    model = td5.read_model(data)
+    location = model.billboard_location if model.flags != 0 else None
+    return geometry.from_td5_model(model, weld_tolerance), location
+
+######################################################
+# WORKER PROCESSES
+######################################################
+# archive being decoded, mapped once per worker process
+worker_archive = None
+
+def init_worker(filepath):
+    global worker_archive
+    worker_archive = archive.ModelsArchive(filepath)
+
+
+def decode_td5_chunk(indices, weld_tolerance):
+    return [decode_td5_model(worker_archive.model(i), weld_tolerance) for i in indices]
+
+
+def split_chunks(items, chunk_count):
+    chunk_size = max(1, -(-len(items) // chunk_count))
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+class DecodePool:
+    """Worker processes decoding models of one models.dat, kept between batches"""
+
+    def __init__(self, models, weld_tolerance=0.0, workers=2):
+        self.models = models
+        self.weld_tolerance = weld_tolerance
+        self.workers = workers
+        self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def decode(self, indices, chunk_count=None):
+        # decodes the given models, in order. the processes are started by
+        # the first call, spawned rather than forked since forking a running
+        # Blender is not safe
+        indices = list(indices)
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers,
+                                                                   mp_context=multiprocessing.get_context("spawn"),
+                                                                   initializer=init_worker,
+                                                                   initargs=(self.models.filepath,))
+
+        chunks = split_chunks(indices, chunk_count or self.workers)
+        results = []
+        for chunk_results in self.executor.map(decode_td5_chunk, chunks, [self.weld_tolerance] * len(chunks)):
+            results += chunk_results
+        return results
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def decode_td5_models(models, indices, weld_tolerance=0.0, workers=0):
+    # decodes the given models of a ModelsArchive, in order
+    # workers <= 1 decodes on the calling thread
+    indices = list(indices)
+    if workers <= 1 or len(indices) < 2:
+        return [decode_td5_model(models.model(i), weld_tolerance) for i in indices]
+
+    # a few chunks per worker keeps them busy when model sizes vary
+    with DecodePool(models, weld_tolerance, workers) as pool:
+        return pool.decode(indices, workers * 4)
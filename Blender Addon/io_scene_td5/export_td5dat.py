@@ -7,10 +7,14 @@
 #
 # ##### END LICENSE BLOCK #####
 
-import bpy, bmesh
-import os, time, struct
+import bpy
+import time, struct, math, logging
+import numpy as np
 
-import os.path as path
+from . import mesh_builder, profiling
+from .formats import td5
+
+log = logging.getLogger(__name__)
 
 ######################################################
 # EXPORT FUINCTIONS
@@ -27,118 +31,199 @@ def translate_uv(uv):
     return (uv[0], 1 - uv[1])
 
 
-def export_object(file, ob, apply_modifiers):
-    # create temp mesh
-    temp_mesh = None
-    if apply_modifiers:
-        dg = bpy.context.evaluated_depsgraph_get()
-        eval_obj = ob.evaluated_get(dg)
-        temp_mesh = eval_obj.to_mesh()
-    else:
-        temp_mesh = ob.to_mesh()
-        
-    # get bmesh
-    bm = bmesh.new()
-    bm.from_mesh(temp_mesh)
-
-    # get and sort triangles
-    triangles_unsorted = bm.calc_loop_triangles()
-    triangles = []
-    triangles_unwrapped = []
-   
-    triangles_buckets = {}   
-    for luple in triangles_unsorted:
-        face = luple[0].face
-        material_index = face.material_index
-        
-        bucket = []
-        if not material_index in triangles_buckets:
-            triangles_buckets[material_index] = bucket
-        else:
-            bucket = triangles_buckets[material_index]
-            
-        bucket.append(luple)
-        
-    for key in sorted(triangles_buckets):
-        triangles += triangles_buckets[key]
+# array versions of the above, vertices are expected in double precision
+def translate_vertices(vertices):
+    result = np.empty(vertices.shape, dtype=np.float32)
+    result[:, 0] = vertices[:, 0] / 0.01
+    result[:, 1] = vertices[:, 2] / 0.01
+    result[:, 2] = vertices[:, 1] / 0.01 * -1
+    return result
+
+
+def translate_normals(normals):
+    result = np.empty(normals.shape, dtype=np.float32)
+    result[:, 0] = normals[:, 0]
+    result[:, 1] = normals[:, 2]
+    result[:, 2] = normals[:, 1] * -1
+    return result
+
+
+# quads folded more than this along their diagonal are split into triangles
+QUAD_MAX_FOLD = math.radians(1.0)
+
+
+def planar_convex_quads(positions, corners):
+    # which (N, 4) quads are flat enough and convex, so they can be written
+    # as quads. corners index into positions
+    points = positions[corners]
+    
+    # flat, the two halves either side of the 0-2 diagonal face the same way
+    half_a = np.cross(points[:, 1] - points[:, 0], points[:, 2] - points[:, 0])
+    half_b = np.cross(points[:, 2] - points[:, 0], points[:, 3] - points[:, 0])
+    length_a = np.linalg.norm(half_a, axis=1)
+    length_b = np.linalg.norm(half_b, axis=1)
+    nondegenerate = (length_a > 1e-12) & (length_b > 1e-12)
+    fold = np.einsum('ij,ij->i', half_a, half_b) / np.where(nondegenerate, length_a * length_b, 1.0)
+    flat = nondegenerate & (fold >= math.cos(QUAD_MAX_FOLD))
+    
+    # convex, every corner turns the same way around the quad normal
+    normal = half_a + half_b
+    edges = np.roll(points, -1, axis=1) - points
+    turns = np.cross(np.roll(edges, 1, axis=1), edges)
+    convex = (np.einsum('ijk,ik->ij', turns, normal) > 0).all(axis=1)
+    
+    return flat & convex
+
+
+def write_mesh(file, ob, temp_mesh, keep_quads=False):
+    # writes temp_mesh, the evaluated mesh of ob. returns the (triangle,
+    # quad) counts written
+    
+    # triangulate, every triangle corner keeps its mesh loop
+    temp_mesh.calc_loop_triangles()
+    triangles_count = len(temp_mesh.loop_triangles)
+    triangle_loops = np.empty(triangles_count * 3, dtype=np.int32)
+    temp_mesh.loop_triangles.foreach_get("loops", triangle_loops)
+    triangle_polygons = np.empty(triangles_count, dtype=np.int32)
+    temp_mesh.loop_triangles.foreach_get("polygon_index", triangle_polygons)
+    polygon_materials = np.empty(len(temp_mesh.polygons), dtype=np.int32)
+    temp_mesh.polygons.foreach_get("material_index", polygon_materials)
+    
+    loop_verts = np.empty(len(temp_mesh.loops), dtype=np.int32)
+    temp_mesh.loops.foreach_get("vertex_index", loop_verts)
+    positions = np.empty(len(temp_mesh.vertices) * 3, dtype=np.float32)
+    temp_mesh.vertices.foreach_get("co", positions)
+    positions = positions.reshape(-1, 3).astype(np.float64)
+    
+    # faces as (loops padded to 4, corner count, material), quads that can
+    # stay quads replace the triangles they were split into
+    face_loops = np.zeros((triangles_count, 4), dtype=np.int64)
+    face_loops[:, :3] = triangle_loops.reshape(-1, 3)
+    face_sizes = np.full(triangles_count, 3, dtype=np.int64)
+    face_materials = polygon_materials[triangle_polygons]
+    
+    if keep_quads:
+        polygon_starts = np.empty(len(temp_mesh.polygons), dtype=np.int32)
+        temp_mesh.polygons.foreach_get("loop_start", polygon_starts)
+        polygon_sizes = np.empty(len(temp_mesh.polygons), dtype=np.int32)
+        temp_mesh.polygons.foreach_get("loop_total", polygon_sizes)
         
-    for luple in triangles:
-        triangles_unwrapped += luple
+        quads = np.flatnonzero(polygon_sizes == 4)
+        quad_loops = polygon_starts[quads][:, None] + np.arange(4)
+        keep = planar_convex_quads(positions, loop_verts[quad_loops])
+        quads, quad_loops = quads[keep], quad_loops[keep]
         
-    # vars
-    uv_layer = bm.loops.layers.uv.active
-    vc_layer = bm.loops.layers.color.active
+        is_quad = np.zeros(len(temp_mesh.polygons), dtype=bool)
+        is_quad[quads] = True
+        split = ~is_quad[triangle_polygons]
+        face_loops = np.concatenate((face_loops[split], quad_loops))
+        face_sizes = np.concatenate((face_sizes[split], np.full(len(quads), 4, dtype=np.int64)))
+        face_materials = np.concatenate((face_materials[split], polygon_materials[quads]))
     
-    num_materials = len(ob.material_slots)
+    # one submesh per material slot, faces past the last slot use the last
+    # one like they do in Blender. each submesh is its tris then its quads,
+    # a stable sort keeps the mesh order within those
+    num_materials = max(len(ob.material_slots), 1)
+    face_materials = np.clip(face_materials, 0, num_materials - 1)
+    is_quad_face = face_sizes == 4
+    order = np.argsort(face_materials * 2 + is_quad_face, kind='stable')
+    submesh_triangle_counts = np.bincount(face_materials[~is_quad_face], minlength=num_materials)
+    submesh_quad_counts = np.bincount(face_materials[is_quad_face], minlength=num_materials)
+    if max(submesh_triangle_counts.max(), submesh_quad_counts.max()) > 0xFFFF:
+        raise Exception("A material of %s has more than 65535 triangles or quads" % ob.name)
+    
+    corner_used = np.arange(4) < face_sizes[order][:, None]
+    loop_indices = face_loops[order][corner_used]
+    corner_verts = loop_verts[loop_indices]
+    
+    # vars
+    uv_layer = temp_mesh.uv_layers.active
+    vc_layer, vc_prop = mesh_builder.color_layer_active(temp_mesh)
     
     max_dimension = max(ob.dimensions)
     center = translate_vertex(ob.location)
     
-    triangles_loops_len = len(triangles) * 3
-    triangles_count = len(triangles)
+    corner_count = len(loop_indices)
     
     # calculate offsets
     submesh_offset = 64
     vertex_offset = submesh_offset + (16 * num_materials)
-    normals_offset = vertex_offset + (44 * triangles_loops_len)
+    normals_offset = vertex_offset + (44 * corner_count)
     
     # header
-    file.write(struct.pack('L', 259))
-    file.write(struct.pack('LL', num_materials, triangles_loops_len))
-    file.write(struct.pack('f', max_dimension))
-    file.write(struct.pack('fff', *center))
-    file.write(struct.pack('LLLL', 0, 0, 0, 0))
-    file.write(struct.pack('LLL', submesh_offset, vertex_offset, normals_offset))
-    file.write(struct.pack('LL', 0, 0))
+    file.write(struct.pack('<L', 259))
+    file.write(struct.pack('<LL', num_materials, corner_count))
+    file.write(struct.pack('<f', max_dimension))
+    file.write(struct.pack('<fff', *center))
+    file.write(struct.pack('<LLLL', 0, 0, 0, 0))
+    file.write(struct.pack('<LLL', submesh_offset, vertex_offset, normals_offset))
+    file.write(struct.pack('<LL', 0, 0))
     
     # submeshes
+    submeshes = np.zeros(num_materials, dtype=td5.SUBMESH_DTYPE)
+    submeshes['tri_count'] = submesh_triangle_counts
+    submeshes['quad_count'] = submesh_quad_counts
     for submesh in range(num_materials):
-        submesh_triangles_count = len(triangles_buckets[submesh])
-        material = ob.material_slots[submesh].material
+        material = ob.material_slots[submesh].material if submesh < len(ob.material_slots) else None
         texnum = submesh
         
         if material is not None and "TD5TextureNumber" in material:
             texnum = int(material["TD5TextureNumber"])
-        
-        file.write(struct.pack('H', 0))
-        file.write(struct.pack('H', texnum))
-        file.write(struct.pack('L', 0))
-        file.write(struct.pack('HH', submesh_triangles_count, 0))
-        file.write(struct.pack('L', 0))
-    
-    # 'vertices'
-    for loop in triangles_unwrapped:
-        color = (1,1,1,1)
-        uv = (0, 0)
-        co = translate_vertex(loop.vert.co)
-        
-        if uv_layer is not None:
-            uv = translate_uv(loop[uv_layer].uv)
-        if vc_layer is not None:
-            color = loop[vc_layer]
-            
-        file.write(struct.pack('fff', *co)) # position
-        file.write(struct.pack('LLLL', 0, 0, 0, 0)) # unknown
-        file.write(struct.pack('ff', *uv)) # uv
-        file.write(struct.pack('L', 0)) # unknown
-        
-        cr = int(max(min(color[0], 1.0), 0.0) * 255)
-        cg = int(max(min(color[1], 1.0), 0.0) * 255)
-        cb = int(max(min(color[2], 1.0), 0.0) * 255)
-        ca = int(max(min(color[3], 1.0), 0.0) * 255)
-        file.write(struct.pack('BBBB', cr, cg, cb, ca)) # color
-        
+        submeshes[submesh]['texture_id'] = texnum
+    
+    file.write(submeshes.tobytes())
+    
+    # 'vertices', translated in double precision like the scalar versions
+    vertices = np.zeros(corner_count, dtype=td5.VERTEX_DTYPE)
+    vertices['position'] = translate_vertices(positions[corner_verts])
+    
+    if uv_layer is not None:
+        uvs = np.empty(len(temp_mesh.loops) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uvs)
+        uvs = uvs.reshape(-1, 2).astype(np.float64)[loop_indices]
+        vertices['uv'][:, 0] = uvs[:, 0]
+        vertices['uv'][:, 1] = 1 - uvs[:, 1]
+    
+    if vc_layer is not None:
+        colors = np.empty(len(temp_mesh.loops) * 4, dtype=np.float32)
+        vc_layer.data.foreach_get(vc_prop, colors)
+        colors = colors.reshape(-1, 4).astype(np.float64)[loop_indices]
+        vertices['color'] = (np.clip(colors, 0.0, 1.0) * 255).astype(np.uint8)
+    else:
+        vertices['color'] = 255
+    
+    file.write(vertices.tobytes())
+    
     # 'normals'
-    for loop in triangles_unwrapped:
-        normal = translate_normal(loop.vert.normal)
-       
-        file.write(struct.pack('fff', *normal))
-        file.write(struct.pack('L', 0))
+    vert_normals = np.empty(len(temp_mesh.vertices) * 3, dtype=np.float32)
+    temp_mesh.vertices.foreach_get("normal", vert_normals)
+    vert_normals = vert_normals.reshape(-1, 3)[corner_verts]
+    
+    normals = np.zeros(corner_count, dtype=td5.NORMAL_DTYPE)
+    normals['normal'] = translate_normals(vert_normals)
     
-    # finish off
-    bm.free()
-    file.close()
-    return
+    file.write(normals.tobytes())
+    
+    return int(submesh_triangle_counts.sum()), int(submesh_quad_counts.sum())
+
+
+def export_object(file, ob, apply_modifiers, depsgraph=None, keep_quads=False):
+    # create temp mesh. pass in a depsgraph when exporting several objects
+    # so it's only evaluated once. returns the (triangle, quad) counts written
+    temp_mesh = None
+    mesh_owner = ob
+    with profiling.phase("evaluate"):
+        if apply_modifiers:
+            dg = depsgraph if depsgraph is not None else bpy.context.evaluated_depsgraph_get()
+            mesh_owner = ob.evaluated_get(dg)
+            temp_mesh = mesh_owner.to_mesh()
+        else:
+            temp_mesh = ob.to_mesh()
+    
+    try:
+        return write_mesh(file, ob, temp_mesh, keep_quads)
+    finally:
+        mesh_owner.to_mesh_clear()
 
     
 ######################################################
@@ -146,35 +231,36 @@ def export_object(file, ob, apply_modifiers):
 ######################################################
 def save_dat(filepath,
              apply_modifiers,
-             context):
+             context,
+             keep_quads=False):
 
     # throw exception if a model isn't selected for exporting
     export_ob = context.view_layer.objects.active
     if export_ob is None:
         raise Exception("Select an object for exporting to the DAT first")
     
-    print("Exporting DAT: %r..." % (filepath))
+    log.info("Exporting DAT: %r..." % (filepath))
     
     time1 = time.perf_counter()
-    file = open(filepath, 'wb')
-    
-    export_object(file, export_ob, apply_modifiers)
+    with open(filepath, 'wb') as file, profiling.phase("export"):
+        export_object(file, export_ob, apply_modifiers, keep_quads=keep_quads)
    
     # end write dat file
-    print(" done in %.4f sec." % (time.perf_counter() - time1))
-    file.close()
+    log.info(" done in %.4f sec." % (time.perf_counter() - time1))
 
 
 def save(operator,
          context,
          filepath="",
          apply_modifiers=False,
+         keep_quads=False,
          ):
     
     # save DAT
     save_dat(filepath,
              apply_modifiers,
              context,
+             keep_quads,
              )
 
     return {'FINISHED'}
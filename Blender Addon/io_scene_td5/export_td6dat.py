@@ -0,0 +1,135 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import bpy
+import time, logging
+import numpy as np
+
+from . import mesh_builder, profiling, submeshes, vertex_cache
+from .export_td5dat import translate_vertices, translate_normals
+from .formats import td6
+
+log = logging.getLogger(__name__)
+
+######################################################
+# EXPORT FUNCTIONS
+######################################################
+def texture_number(ob, slot):
+    material = ob.material_slots[slot].material if slot < len(ob.material_slots) else None
+    if material is not None:
+        for prop in ("TD6TextureNumber", "TD5TextureNumber"):
+            if prop in material:
+                return int(material[prop])
+    return slot
+
+
+def mesh_submeshes(ob, temp_mesh, is_track, cache_size):
+    # reads the triangulated mesh into arrays for submeshes.build_submeshes
+    temp_mesh.calc_loop_triangles()
+    triangles_count = len(temp_mesh.loop_triangles)
+    triangle_loops = np.empty(triangles_count * 3, dtype=np.int32)
+    temp_mesh.loop_triangles.foreach_get("loops", triangle_loops)
+    triangle_polygons = np.empty(triangles_count, dtype=np.int32)
+    temp_mesh.loop_triangles.foreach_get("polygon_index", triangle_polygons)
+    polygon_materials = np.empty(len(temp_mesh.polygons), dtype=np.int32)
+    temp_mesh.polygons.foreach_get("material_index", polygon_materials)
+
+    loop_verts = np.empty(len(temp_mesh.loops), dtype=np.int32)
+    temp_mesh.loops.foreach_get("vertex_index", loop_verts)
+    positions = np.empty(len(temp_mesh.vertices) * 3, dtype=np.float32)
+    temp_mesh.vertices.foreach_get("co", positions)
+    positions = translate_vertices(positions.reshape(-1, 3).astype(np.float64))
+
+    loop_uvs = np.zeros((len(temp_mesh.loops), 2), dtype=np.float32)
+    uv_layer = temp_mesh.uv_layers.active
+    if uv_layer is not None:
+        uv_layer.data.foreach_get("uv", loop_uvs.ravel())
+
+    normals = None
+    loop_colors = None
+    if is_track:
+        loop_colors = np.ones((len(temp_mesh.loops), 4), dtype=np.float32)
+        vc_layer, vc_prop = mesh_builder.color_layer_active(temp_mesh)
+        if vc_layer is not None:
+            vc_layer.data.foreach_get(vc_prop, loop_colors.ravel())
+        loop_colors = (np.clip(loop_colors, 0.0, 1.0) * 255).astype(np.uint8)
+    else:
+        normals = np.empty(len(temp_mesh.vertices) * 3, dtype=np.float32)
+        temp_mesh.vertices.foreach_get("normal", normals)
+        normals = translate_normals(normals.reshape(-1, 3))
+
+    # one or more submeshes per material slot, faces past the last slot use
+    # the last one like they do in Blender
+    num_materials = max(len(ob.material_slots), 1)
+    triangle_materials = np.clip(polygon_materials[triangle_polygons], 0, num_materials - 1)
+    texture_numbers = [texture_number(ob, slot) for slot in range(num_materials)]
+
+    return submeshes.build_submeshes(triangle_loops, triangle_materials, texture_numbers,
+                                     loop_verts, positions, loop_uvs, normals, loop_colors, cache_size)
+
+
+def export_object(file, ob, apply_modifiers, depsgraph=None, is_track=False, cache_size=vertex_cache.CACHE_SIZE):
+    # returns (triangle count, ACMR before, ACMR after)
+    temp_mesh = None
+    mesh_owner = ob
+    with profiling.phase("evaluate"):
+        if apply_modifiers:
+            dg = depsgraph if depsgraph is not None else bpy.context.evaluated_depsgraph_get()
+            mesh_owner = ob.evaluated_get(dg)
+            temp_mesh = mesh_owner.to_mesh()
+        else:
+            temp_mesh = ob.to_mesh()
+
+    try:
+        model_submeshes, acmr_before, acmr_after = mesh_submeshes(ob, temp_mesh, is_track, cache_size)
+    finally:
+        mesh_owner.to_mesh_clear()
+
+    td6.write_model(file, model_submeshes)
+    return sum(len(indices) for _, _, indices in model_submeshes), acmr_before, acmr_after
+
+######################################################
+# EXPORT
+######################################################
+def save_dat(filepath,
+             apply_modifiers,
+             is_track,
+             context):
+
+    # throw exception if a model isn't selected for exporting
+    export_ob = context.view_layer.objects.active
+    if export_ob is None:
+        raise Exception("Select an object for exporting to the DAT first")
+
+    log.info("Exporting TD6 DAT: %r..." % (filepath))
+
+    time1 = time.perf_counter()
+    with open(filepath, 'wb') as file, profiling.phase("export"):
+        triangles_count, acmr_before, acmr_after = export_object(file, export_ob, apply_modifiers, is_track=is_track)
+    log.info(" %d triangles, ACMR %.3f before reordering, %.3f after" % (triangles_count, acmr_before, acmr_after))
+
+    log.info(" done in %.4f sec." % (time.perf_counter() - time1))
+    return acmr_before, acmr_after
+
+
+def save(operator,
+         context,
+         filepath="",
+         apply_modifiers=False,
+         is_track=False,
+         ):
+
+    acmr_before, acmr_after = save_dat(filepath,
+                                       apply_modifiers,
+                                       is_track,
+                                       context,
+                                       )
+
+    operator.report({'INFO'}, "Vertex cache ACMR %.3f -> %.3f" % (acmr_before, acmr_after))
+    return {'FINISHED'}
@@ -0,0 +1,16 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# File format readers. Nothing in here touches bpy, so these can be used
+# (and benchmarked) from plain Python as well as from inside Blender.
+
+from .archive import PaletteTexture
+from .td5 import TD5Model, TD5CollisionStrips
+from .td6 import TD6Model, TD6TextureDirectory
+from .tdo3 import TDO3Mesh, TDO3TextureRef
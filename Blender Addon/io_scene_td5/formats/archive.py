@@ -0,0 +1,181 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import mmap
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+######################################################
+# MODELS.DAT
+######################################################
+def read_model_table(data):
+    # returns (offsets, sizes, groups) of every model in a models.dat, offsets
+    # are from the start of the file and groups is the index of the group
+    # each model belongs to
+    group_count = struct.unpack_from('<L', data, 0)[0]
+    groups = np.frombuffer(data, dtype='<u4', count=group_count * 2, offset=4).reshape(-1, 2)
+
+    offsets = []
+    sizes = []
+    model_groups = []
+    for group_index, (group_offset, group_size) in enumerate(groups.tolist()):
+        model_count = struct.unpack_from('<L', data, group_offset)[0]
+        if model_count == 0:
+            continue
+
+        # read one extra entry, TD6 has a 0 in front of the list
+        table = np.frombuffer(data, dtype='<u4', count=model_count + 1, offset=group_offset + 4).astype(np.int64)
+        if table[0] == 0 or table[0] == 1:
+            table = table[1:]
+        else:
+            table = table[:-1]
+
+        ends = np.append(table[1:], group_size)
+        offsets.append(table + group_offset)
+        sizes.append(ends - table)
+        model_groups.append(np.full(len(table), group_index, dtype=np.int32))
+
+    if len(offsets) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+    return np.concatenate(offsets), np.concatenate(sizes), np.concatenate(model_groups)
+
+
+def read_model_bounds(data, offsets):
+    # TD5 and TD6 model headers both keep a bounding sphere (radius, center)
+    # at +12, in game units. returns (radii, centers)
+    if len(offsets) == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros((0, 3), dtype=np.float32)
+    bounds = np.array([struct.unpack_from('<ffff', data, int(o) + 12) for o in offsets], dtype=np.float32)
+    return bounds[:, 0], bounds[:, 1:]
+
+
+class ModelsArchive:
+    """A memory mapped models.dat, models are handed out as memoryview slices"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.file = open(filepath, 'rb')
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self.mmap)
+        self.model_offsets, self.model_sizes, self.model_groups = read_model_table(self.data)
+
+    def __len__(self):
+        return len(self.model_offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def model(self, index):
+        offset = int(self.model_offsets[index])
+        return self.data[offset:offset + int(self.model_sizes[index])]
+
+    def model_bounds(self):
+        return read_model_bounds(self.data, self.model_offsets)
+
+    def close(self):
+        if self.data is None:
+            return
+        self.data.release()
+        self.mmap.close()
+        self.file.close()
+        self.data = None
+
+######################################################
+# TEXTURES.DAT
+######################################################
+TEXTURE_SIZE = 64
+
+TEXTURE_MAGIC = (6, 6)
+
+# texture flags
+TEXTURE_FLAG_CHROMA_KEY = 256
+TEXTURE_FLAG_ADDITIVE = 512
+
+
+@dataclass
+class PaletteTexture:
+    """A 64x64 palettized texture from textures.dat, palette is RGBA"""
+    flags: int
+    palette: np.ndarray
+    indices: np.ndarray
+
+    @property
+    def additive(self):
+        return (self.flags & TEXTURE_FLAG_ADDITIVE) != 0
+
+    def decode(self):
+        # (64, 64, 4) RGBA bytes, top row first
+        return self.palette[self.indices]
+
+
+def read_texture_table(data):
+    texture_count = struct.unpack_from('<L', data, 0)[0]
+    return np.frombuffer(data, dtype='<u4', count=texture_count, offset=4).astype(np.int64)
+
+
+def read_texture(data, offset):
+    magic = struct.unpack_from('BB', data, offset)
+    flags, palette_size = struct.unpack_from('<hL', data, offset + 2)
+    if magic != TEXTURE_MAGIC:
+        print("Unknown texture header? @%d, %d %d" % (offset, magic[0], magic[1]))
+
+    # BGR palette, padded out to 256 entries so stray indices come out black
+    bgr = np.frombuffer(data, dtype='u1', count=palette_size * 3, offset=offset + 8).reshape(-1, 3)
+    palette = np.zeros((256, 4), dtype=np.uint8)
+    palette[:, 3] = 255
+    palette[:palette_size, :3] = bgr[:, ::-1]
+    if (flags & TEXTURE_FLAG_CHROMA_KEY) != 0:
+        palette[:palette_size, 3][(bgr == 0).all(axis=1)] = 0
+
+    indices = np.frombuffer(data, dtype='u1', count=TEXTURE_SIZE * TEXTURE_SIZE, offset=offset + 8 + palette_size * 3)
+    return PaletteTexture(flags=flags,
+                          palette=palette,
+                          indices=indices.reshape(TEXTURE_SIZE, TEXTURE_SIZE))
+
+
+class TexturesArchive:
+    """A memory mapped textures.dat"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.file = open(filepath, 'rb')
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self.mmap)
+        self.texture_offsets = read_texture_table(self.data)
+
+    def __len__(self):
+        return len(self.texture_offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def texture(self, index):
+        return read_texture(self.data, int(self.texture_offsets[index]))
+
+    def decode_all(self):
+        # (count, 64, 64, 4) RGBA bytes
+        if len(self) == 0:
+            return np.zeros((0, TEXTURE_SIZE, TEXTURE_SIZE, 4), dtype=np.uint8)
+        return np.stack([self.texture(i).decode() for i in range(len(self))])
+
+    def close(self):
+        if self.data is None:
+            return
+        self.data.release()
+        self.mmap.close()
+        self.file.close()
+        self.data = None
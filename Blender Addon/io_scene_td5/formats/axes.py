@@ -0,0 +1,46 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Game space to Blender space, shared by the TD5 and TD6 readers. Game units
+# are centimetres with Y up, Blender gets metres with Z up
+
+import numpy as np
+
+######################################################
+# TRANSLATIONS
+######################################################
+def translate_vertex(vertex):
+    return (vertex[0] * 0.01,vertex[2] * 0.01 * -1,vertex[1] * 0.01)
+
+# array versions, these work in double precision like the scalar version
+# does and only round to float32 at the end
+def translate_vertices(vertices):
+    vertices = vertices.astype(np.float64)
+    result = np.empty(vertices.shape, dtype=np.float32)
+    result[:, 0] = vertices[:, 0] * 0.01
+    result[:, 1] = vertices[:, 2] * 0.01 * -1
+    result[:, 2] = vertices[:, 1] * 0.01
+    return result
+
+def translate_normals(normals):
+    result = np.empty(normals.shape, dtype=np.float32)
+    result[:, 0] = normals[:, 0]
+    result[:, 1] = normals[:, 2] * -1
+    result[:, 2] = normals[:, 1]
+    return result
+
+def translate_uvs(uvs):
+    uvs = uvs.astype(np.float64)
+    result = np.empty(uvs.shape, dtype=np.float32)
+    result[:, 0] = uvs[:, 0]
+    result[:, 1] = 1 - uvs[:, 1]
+    return result
+
+def translate_colors(colors):
+    return (colors.astype(np.float64) / 255).astype(np.float32)
@@ -0,0 +1,178 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+from .axes import translate_vertex, translate_vertices, translate_uvs, translate_colors
+
+MODEL_MAGIC = 259
+
+# 44 byte vertex record
+VERTEX_DTYPE = np.dtype([
+    ('position', '<f4', 3),
+    ('unknown', '<u4', 4),
+    ('uv', '<f4', 2),
+    ('unknown2', '<u4'),
+    ('color', 'u1', 4),
+])
+
+# 16 byte normal record
+NORMAL_DTYPE = np.dtype([
+    ('normal', '<f4', 3),
+    ('unknown', '<u4'),
+])
+
+# 24 byte collision strip record
+STRIP_DTYPE = np.dtype([
+    ('type', 'u1'),
+    ('unknown', 'u1'),
+    ('materials', 'u1'),
+    ('flags', 'u1'),
+    ('index1', '<u2'),
+    ('index2', '<u2'),
+    ('data1', '<u2'),
+    ('data2', '<u2'),
+    ('offset', '<i4', 3),
+])
+
+# how far the end of each strip row moves, by strip type, for (row 1, row 2)
+STRIP_INDEX_OFFSETS = np.array([0,0,0,0,-1,0,-1,0,-2,0,0,-1,0,-1,0,-2,0,0,0,0,0,0,0,0], dtype=np.int64).reshape(-1, 2)
+
+# 16 byte submesh descriptor
+SUBMESH_DTYPE = np.dtype([
+    ('unknown', '<u2'),
+    ('texture_id', '<u2'),
+    ('unknown2', '<u4'),
+    ('tri_count', '<u2'),
+    ('quad_count', '<u2'),
+    ('unknown3', '<u4'),
+])
+
+######################################################
+# HELPERS
+######################################################
+def translate_normals(normals):
+    # (x, -y, -z), what the per-vertex reader ended up with. TD6 normals use
+    # the same swap as positions, see axes.translate_normals
+    result = np.empty(normals.shape, dtype=np.float32)
+    result[:, 0] = normals[:, 0]
+    result[:, 1] = normals[:, 1] * -1
+    result[:, 2] = normals[:, 2] * -1
+    return result
+
+######################################################
+# MODELS
+######################################################
+@dataclass
+class TD5Model:
+    """A Test Drive 5 model, vertices are already in Blender space"""
+    flags: int
+    radius: float
+    center: tuple
+    texture_ids: np.ndarray
+    tri_counts: np.ndarray
+    quad_counts: np.ndarray
+    vertices: np.ndarray
+    uvs: np.ndarray
+    colors: np.ndarray
+    normals: np.ndarray = None
+
+    @property
+    def billboard_location(self):
+        # where a billboard model appears in-game
+        cx, cy, cz = self.center
+        return translate_vertex((cx, cy - (self.radius * 0.65), cz))
+
+
+def read_model(data, offset=0):
+    flag1 = struct.unpack_from('B', data, offset + 2)[0]
+    submesh_count, vertex_count = struct.unpack_from('<LL', data, offset + 4)
+    radius, cx, cy, cz = struct.unpack_from('<ffff', data, offset + 12)
+    submesh_offset, vertex_offset, normal_offset = struct.unpack_from('<LLL', data, offset + 44)
+
+    submeshes = np.frombuffer(data, dtype=SUBMESH_DTYPE, count=submesh_count, offset=offset + submesh_offset)
+    raw = np.frombuffer(data, dtype=VERTEX_DTYPE, count=vertex_count, offset=offset + vertex_offset)
+
+    normals = None
+    if normal_offset != 0:
+        raw_normals = np.frombuffer(data, dtype=NORMAL_DTYPE, count=vertex_count, offset=offset + normal_offset)
+        normals = translate_normals(raw_normals['normal'])
+
+    return TD5Model(flags=flag1,
+                    radius=radius,
+                    center=(cx, cy, cz),
+                    texture_ids=submeshes['texture_id'].astype(np.int32),
+                    tri_counts=submeshes['tri_count'].astype(np.int32),
+                    quad_counts=submeshes['quad_count'].astype(np.int32),
+                    vertices=translate_vertices(raw['position']),
+                    uvs=translate_uvs(raw['uv']),
+                    colors=translate_colors(raw['color']),
+                    normals=normals)
+
+######################################################
+# COLLISION
+######################################################
+@dataclass
+class TD5CollisionStrips:
+    """Test Drive 5 collision strips (strip.dat / stripb.dat)"""
+    positions: np.ndarray
+    strips: np.ndarray
+    main_strip_count: int
+
+
+def read_collision(data, offset=0):
+    strips_offset, main_strip_count, geo_offset, geo_count, total_strip_count = struct.unpack_from('<LLLLL', data, offset)
+
+    # verts table, left in game units
+    positions = np.frombuffer(data, dtype='<i2', count=geo_count * 3, offset=offset + geo_offset).reshape(-1, 3)
+
+    # strip table, read in one go
+    strips = np.frombuffer(data, dtype=STRIP_DTYPE, count=total_strip_count, offset=offset + strips_offset)
+
+    return TD5CollisionStrips(positions=positions,
+                              strips=strips,
+                              main_strip_count=main_strip_count)
+
+
+def used_strips(collision):
+    # the entry after the end of each strip appears to be garbage?
+    strip_types = collision.strips['type']
+    used = np.ones(len(strip_types), dtype=bool)
+    ends = (strip_types[:-1] == 10) | (np.arange(len(strip_types) - 1) == collision.main_strip_count - 2)
+    used[1:] = ~ends
+    return used
+
+
+def strip_rows(collision):
+    # every used strip joins two rows of positions, index1 -> end1 and
+    # index2 -> end2 (inclusive). returns (row_starts, row_counts,
+    # row_indices, row_offsets). row_starts and row_counts are (strip count,
+    # 2) and point into row_indices, which holds the position index of every
+    # row vertex back to back. row_offsets is the game unit offset of the
+    # strip each row vertex belongs to. rows of unused strips are empty
+    strips = collision.strips
+    used = used_strips(collision)
+    strip_types = np.where(used, strips['type'], 0).astype(np.int64)
+    breadths = (strips['flags'] & 0xF).astype(np.int64)
+
+    row_firsts = np.column_stack((strips['index1'], strips['index2'])).astype(np.int64)
+    row_lasts = row_firsts + breadths[:, None] + STRIP_INDEX_OFFSETS[strip_types]
+    row_counts = np.maximum(row_lasts - row_firsts + 1, 0) * used[:, None]
+
+    # flat list of position indices for all rows
+    row_starts = np.zeros(row_counts.size, dtype=np.int64)
+    np.cumsum(row_counts.ravel()[:-1], out=row_starts[1:])
+    row_of_vertex = np.repeat(np.arange(row_counts.size), row_counts.ravel())
+    row_indices = row_firsts.ravel()[row_of_vertex] + np.arange(len(row_of_vertex)) - row_starts[row_of_vertex]
+    row_offsets = strips['offset'].astype(np.int64)[row_of_vertex // 2]
+
+    return row_starts.reshape(-1, 2), row_counts, row_indices, row_offsets
@@ -0,0 +1,176 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+from .axes import translate_vertex, translate_vertices, translate_normals, translate_uvs, translate_colors
+
+MODEL_MAGIC = 260
+
+# 32 byte vertex records, level models carry a colour instead of a normal
+VERTEX_DTYPE = np.dtype([
+    ('position', '<f4', 3),
+    ('normal', '<f4', 3),
+    ('uv', '<f4', 2),
+])
+
+TRACK_VERTEX_DTYPE = np.dtype([
+    ('position', '<f4', 3),
+    ('unknown', '<u4'),
+    ('color', 'u1', 4),
+    ('unknown2', '<u4'),
+    ('uv', '<f4', 2),
+])
+
+# 32 byte submesh descriptor
+SUBMESH_DTYPE = np.dtype([
+    ('unknown', '<u2'),
+    ('texture_number', '<u2'),
+    ('unknown2', '<u4'),
+    ('vert_count', '<u4'),
+    ('index_count', '<u4'),
+    ('vert_offset', '<u4'),
+    ('index_offset', '<u4'),
+    ('unknown3', '<u4', 2),
+])
+
+# 64 byte textures.dir entry
+TEXTURE_ENTRY_DTYPE = np.dtype([
+    ('filename', 'S32'),
+    ('unknown', '<u4', 4),
+    ('alpha_type', '<u4'),
+    ('unknown2', '<u4', 3),
+])
+
+######################################################
+# MODELS
+######################################################
+@dataclass
+class TD6Model:
+    """A Test Drive 6 model, submesh vertices are stored back to back"""
+    flags: int
+    radius: float
+    center: tuple
+    texture_numbers: np.ndarray
+    vertices: np.ndarray
+    uvs: np.ndarray
+    triangles: np.ndarray
+    triangle_submeshes: np.ndarray
+    colors: np.ndarray = None
+    normals: np.ndarray = None
+
+    @property
+    def billboard_location(self):
+        # where a billboard model appears in-game
+        cx, cy, cz = self.center
+        return translate_vertex((cx, cy - (self.radius * 0.65), cz))
+
+
+def read_model(data, offset=0, is_track=False):
+    header = struct.unpack_from('<H', data, offset)[0]
+    if header != MODEL_MAGIC:
+        raise Exception("Wrong header magic")
+
+    flag1 = struct.unpack_from('B', data, offset + 2)[0]
+    submesh_count, total_vert_count = struct.unpack_from('<LL', data, offset + 4)
+    radius, cx, cy, cz, v4, v5, v6 = struct.unpack_from('<fffffff', data, offset + 12)
+    submesh_offset, vert_offset = struct.unpack_from('<LL', data, offset + 44)
+
+    submeshes = np.frombuffer(data, dtype=SUBMESH_DTYPE, count=submesh_count, offset=offset + submesh_offset)
+    vertex_dtype = TRACK_VERTEX_DTYPE if is_track else VERTEX_DTYPE
+
+    raw_vertices = []
+    triangles = []
+    triangle_submeshes = []
+    vertex_base = 0
+    for s, submesh in enumerate(submeshes):
+        vert_count = int(submesh['vert_count'])
+        index_count = int(submesh['index_count'])
+
+        raw_vertices.append(np.frombuffer(data, dtype=vertex_dtype, count=vert_count,
+                                          offset=offset + int(submesh['vert_offset'])))
+
+        # winding is reversed, indices are local to the submesh
+        indices = np.frombuffer(data, dtype='<u2', count=(index_count // 3) * 3,
+                                offset=offset + int(submesh['index_offset']))
+        triangles.append(indices.reshape(-1, 3)[:, ::-1].astype(np.int32) + vertex_base)
+        triangle_submeshes.append(np.full(index_count // 3, s, dtype=np.int32))
+
+        vertex_base += vert_count
+
+    raw = np.concatenate(raw_vertices) if submesh_count > 0 else np.zeros(0, dtype=vertex_dtype)
+
+    return TD6Model(flags=flag1,
+                    radius=radius,
+                    center=(cx, cy, cz),
+                    texture_numbers=submeshes['texture_number'].astype(np.int32),
+                    vertices=translate_vertices(raw['position']),
+                    uvs=translate_uvs(raw['uv']),
+                    triangles=np.concatenate(triangles) if submesh_count > 0 else np.zeros((0, 3), dtype=np.int32),
+                    triangle_submeshes=np.concatenate(triangle_submeshes) if submesh_count > 0 else np.zeros(0, dtype=np.int32),
+                    colors=translate_colors(raw['color']) if is_track else None,
+                    normals=None if is_track else translate_normals(raw['normal']))
+
+def write_model(file, submeshes):
+    # submeshes are (texture number, vertex records, (N, 3) indices local to
+    # the submesh). the bounding sphere comes from the vertex positions
+    positions = np.concatenate([records['position'] for _, records, _ in submeshes]) if submeshes else np.zeros((0, 3))
+    if len(positions) > 0:
+        center = (positions.min(axis=0) + positions.max(axis=0)) * 0.5
+        radius = float(np.linalg.norm(positions - center, axis=1).max())
+    else:
+        center, radius = np.zeros(3), 0.0
+
+    # calculate offsets, each index block is padded to 4 bytes
+    submesh_offset = 52
+    data_offset = submesh_offset + SUBMESH_DTYPE.itemsize * len(submeshes)
+    table = np.zeros(len(submeshes), dtype=SUBMESH_DTYPE)
+    blocks = []
+    offset = data_offset
+    for s, (texture_number, records, indices) in enumerate(submeshes):
+        # winding is reversed, like read_model expects
+        index_block = indices[:, ::-1].astype('<u2').tobytes()
+        index_block += bytes(-len(index_block) % 4)
+
+        table[s]['texture_number'] = texture_number
+        table[s]['vert_count'] = len(records)
+        table[s]['index_count'] = indices.size
+        table[s]['vert_offset'] = offset
+        table[s]['index_offset'] = offset + records.nbytes
+        blocks += [records.tobytes(), index_block]
+        offset += records.nbytes + len(index_block)
+
+    # header
+    file.write(struct.pack('<HBBLL', MODEL_MAGIC, 0, 0, len(submeshes), int(table['vert_count'].sum())))
+    file.write(struct.pack('<ffff', radius, *center))
+    file.write(struct.pack('<fff', 0, 0, 0))
+    file.write(struct.pack('<L', 0))
+    file.write(struct.pack('<LL', submesh_offset, data_offset))
+
+    file.write(table.tobytes())
+    for block in blocks:
+        file.write(block)
+
+######################################################
+# TEXTURES
+######################################################
+@dataclass
+class TD6TextureDirectory:
+    """textures.dir, alpha type is 0 = none, 1 = alpha, 2 = additive"""
+    filenames: list
+    alpha_types: list
+
+
+def read_texture_directory(data):
+    entries = np.frombuffer(data, dtype=TEXTURE_ENTRY_DTYPE, count=len(data) // TEXTURE_ENTRY_DTYPE.itemsize)
+    return TD6TextureDirectory(filenames=[name.decode("ascii") for name in entries['filename']],
+                               alpha_types=entries['alpha_type'].tolist())
@@ -0,0 +1,134 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+NO_OBJECT = 0xFFFFFFFF
+
+######################################################
+# HELPERS
+######################################################
+def translate_vertex(vertex):
+    return (vertex[0] * -1,vertex[2] * -1,vertex[1])
+
+def translate_normal(normal):
+    return (normal[0] * -1 ,normal[2] * -1 ,normal[1])
+
+def translate_vertices(vertices):
+    result = np.empty(vertices.shape, dtype=np.float32)
+    result[:, 0] = vertices[:, 0] * -1
+    result[:, 1] = vertices[:, 2] * -1
+    result[:, 2] = vertices[:, 1]
+    return result
+
+# normals use the same axis swap as positions
+translate_normals = translate_vertices
+
+######################################################
+# MESHES
+######################################################
+@dataclass
+class TDO3Mesh:
+    """A Test Drive Off-Road 3 mesh, vertices are already in Blender space"""
+    matrix: tuple
+    location: tuple
+    bbox_min: tuple
+    bbox_max: tuple
+    unknown: tuple
+    vertices: np.ndarray
+    normals: np.ndarray
+    uvs: np.ndarray
+    face_materials: np.ndarray
+    triangles: np.ndarray
+
+
+def read_mesh(data, offset, is_track):
+    # returns (mesh, offset just past the mesh)
+    unk_dat_size = 40 if is_track else 44
+    unk_dat_size -= 4
+    offset += unk_dat_size # unknown data
+
+    mtx_row0 = translate_normal(struct.unpack_from('<fff', data, offset)) # xaxis
+    mtx_row1 = translate_normal(struct.unpack_from('<fff', data, offset + 12)) # yaxis
+    mtx_row2 = translate_normal(struct.unpack_from('<fff', data, offset + 24)) # zaxis
+    mtx_row3 = translate_vertex(struct.unpack_from('<fff', data, offset + 36)) # position
+    offset += 48 + 12 # + unknown data
+
+    bbox_min = translate_normal(struct.unpack_from('<fff', data, offset))
+    bbox_max = translate_normal(struct.unpack_from('<fff', data, offset + 12))
+    unk1, unk2, face_count, vert_count = struct.unpack_from('<LLLL', data, offset + 24)
+    offset += 40
+
+    vertices = np.frombuffer(data, dtype='<f4', count=vert_count * 3, offset=offset).reshape(-1, 3)
+    offset += vert_count * 12
+    normals = np.frombuffer(data, dtype='<f4', count=vert_count * 3, offset=offset).reshape(-1, 3)
+    offset += vert_count * 12
+    uvs = np.frombuffer(data, dtype='<f4', count=vert_count * 2, offset=offset).reshape(-1, 2)
+    offset += vert_count * 8
+
+    face_materials = np.frombuffer(data, dtype='<u4', count=face_count, offset=offset)
+    offset += face_count * 4
+    triangles = np.frombuffer(data, dtype='<u4', count=face_count * 3, offset=offset).reshape(-1, 3)
+    offset += face_count * 12
+
+    mesh = TDO3Mesh(matrix=(mtx_row0, mtx_row1, mtx_row2),
+                    location=mtx_row3,
+                    bbox_min=bbox_min,
+                    bbox_max=bbox_max,
+                    unknown=(unk1, unk2),
+                    vertices=translate_vertices(vertices),
+                    normals=translate_normals(normals),
+                    uvs=uvs.astype(np.float32),
+                    face_materials=face_materials.astype(np.int32),
+                    triangles=triangles[:, ::-1].astype(np.int64)) # winding is reversed
+    return mesh, offset
+
+
+def read_object(data, offset, is_track):
+    # returns (mesh or None, offset just past the object)
+    obj_type = struct.unpack_from('<L', data, offset)[0]
+    if obj_type == NO_OBJECT:
+        return None, offset + 4 # ??
+    return read_mesh(data, offset + 4, is_track)
+
+
+def read_track(data, offset=0):
+    # returns every mesh in a .mp file
+    num_models = struct.unpack_from('<L', data, offset)[0]
+    offset += 4
+
+    meshes = []
+    for x in range(num_models):
+        mesh, offset = read_object(data, offset, True)
+        if mesh is not None:
+            meshes.append(mesh)
+            offset += 4
+    return meshes
+
+######################################################
+# TEXTURES
+######################################################
+@dataclass
+class TDO3TextureRef:
+    """TEXTURES.REF, the texture file used by each material number"""
+    filenames: list
+
+
+def read_texture_ref(data):
+    num_textures = struct.unpack_from('<L', data, 0)[0]
+
+    texture_files = []
+    for x in range(num_textures):
+        # 4 bytes of some kind of type, then the name
+        texture_file = bytes(data[8 + (64 * x):68 + (64 * x)]).decode('ascii').rstrip('\x00')
+        texture_files.append(texture_file)
+    return TDO3TextureRef(filenames=texture_files)
@@ -0,0 +1,280 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import weld
+from .formats import axes, td5
+
+######################################################
+# MESH GEOMETRY
+######################################################
+@dataclass
+class MeshGeometry:
+    """Face corner geometry ready for mesh_builder, faces are stored back to back"""
+    vertices: np.ndarray
+    loop_vertices: np.ndarray
+    face_sizes: np.ndarray
+    face_materials: np.ndarray
+    materials: list
+    loop_uvs: np.ndarray = None
+    loop_colors: np.ndarray = None
+    face_attributes: dict = None
+    welded: int = 0
+
+######################################################
+# HELPERS
+######################################################
+def face_loop_starts(face_sizes):
+    loop_starts = np.zeros(len(face_sizes), dtype=np.int32)
+    np.cumsum(face_sizes[:-1], out=loop_starts[1:])
+    return loop_starts
+
+
+def filter_faces(loop_vertices, face_sizes, vertex_count):
+    # returns a mask of faces that bm.faces.new would accept: no repeated
+    # vertices, no missing vertices, and not a copy of an earlier face
+    face_count = len(face_sizes)
+    if face_count == 0:
+        return np.zeros(0, dtype=bool)
+
+    max_size = int(face_sizes.max())
+    loop_starts = face_loop_starts(face_sizes)
+
+    # pad every face out to the largest face size with -1
+    padded = np.full((face_count, max_size), -1, dtype=np.int64)
+    for corner in range(max_size):
+        has_corner = face_sizes > corner
+        padded[has_corner, corner] = loop_vertices[loop_starts[has_corner] + corner]
+
+    valid = (padded < vertex_count).all(axis=1)
+
+    padded.sort(axis=1)
+    repeated = ((padded[:, 1:] == padded[:, :-1]) & (padded[:, 1:] >= 0)).any(axis=1)
+
+    # faces made from the same set of vertices, keep the first one
+    _, first = np.unique(padded, axis=0, return_index=True)
+    unique = np.zeros(face_count, dtype=bool)
+    unique[first] = True
+
+    return valid & ~repeated & unique
+
+
+def group_runs(group_keys):
+    # splits range(len(group_keys)) into runs of equal consecutive keys
+    group_keys = np.asarray(group_keys)
+    if len(group_keys) == 0:
+        return []
+    breaks = np.flatnonzero(group_keys[1:] != group_keys[:-1]) + 1
+    return np.split(np.arange(len(group_keys)), breaks)
+
+
+def completion_order(chunks):
+    # indices of chunks of model indices, ordered by the last model each one
+    # needs. models decode in index order, so chunks come out ready to build
+    return sorted(range(len(chunks)), key=lambda c: max(chunks[c], default=-1))
+
+######################################################
+# MERGING
+######################################################
+def merge_geometry(geoms, locations=None, sources=None, source_attribute="model_offset"):
+    # concatenates geometry into one, material slots are shared by texture
+    # number. locations are added to vertices so billboards keep their place,
+    # and sources are stored per face in an integer face attribute
+    material_slots = {}
+    vertex_base = 0
+
+    vertices = []
+    loop_vertices = []
+    face_materials = []
+    loop_uvs = []
+    loop_colors = []
+    face_sources = []
+
+    has_uvs = any(geom.loop_uvs is not None for geom in geoms)
+    has_colors = any(geom.loop_colors is not None for geom in geoms)
+
+    for i, geom in enumerate(geoms):
+        # the trailing 0 covers geometry without any material slots
+        slot_remap = np.array([material_slots.setdefault(texnum, len(material_slots)) for texnum in geom.materials] + [0], dtype=np.int32)
+        location = locations[i] if locations is not None else None
+        loop_count = len(geom.loop_vertices)
+
+        vertices.append(geom.vertices if location is None else geom.vertices + np.array(location, dtype=np.float32))
+        loop_vertices.append(geom.loop_vertices + vertex_base)
+        face_materials.append(slot_remap[geom.face_materials])
+        if has_uvs:
+            loop_uvs.append(geom.loop_uvs if geom.loop_uvs is not None else np.zeros((loop_count, 2), dtype=np.float32))
+        if has_colors:
+            loop_colors.append(geom.loop_colors if geom.loop_colors is not None else np.ones((loop_count, 4), dtype=np.float32))
+        if sources is not None:
+            face_sources.append(np.full(len(geom.face_sizes), sources[i], dtype=np.int32))
+
+        vertex_base += len(geom.vertices)
+
+    if len(geoms) == 0:
+        return MeshGeometry(vertices=np.zeros((0, 3), dtype=np.float32),
+                            loop_vertices=np.zeros(0, dtype=np.int32),
+                            face_sizes=np.zeros(0, dtype=np.int32),
+                            face_materials=np.zeros(0, dtype=np.int32),
+                            materials=[])
+
+    return MeshGeometry(vertices=np.concatenate(vertices),
+                        loop_vertices=np.concatenate(loop_vertices),
+                        face_sizes=np.concatenate([geom.face_sizes for geom in geoms]),
+                        face_materials=np.concatenate(face_materials),
+                        materials=list(material_slots),
+                        loop_uvs=np.concatenate(loop_uvs) if has_uvs else None,
+                        loop_colors=np.concatenate(loop_colors) if has_colors else None,
+                        face_attributes={source_attribute: np.concatenate(face_sources)} if sources is not None else None,
+                        welded=sum(geom.welded for geom in geoms))
+
+######################################################
+# CONVERSION
+######################################################
+def from_td5_model(model, weld_tolerance=0.0):
+    # each submesh is its tris followed by its quads, and every face corner
+    # has its own vertex record
+    corner_counts = np.column_stack((model.tri_counts, model.quad_counts)).ravel()
+    face_sizes = np.repeat(np.tile(np.array([3, 4], dtype=np.int32), len(model.tri_counts)), corner_counts)
+    face_materials = np.repeat(np.arange(len(model.tri_counts), dtype=np.int32), model.tri_counts + model.quad_counts)
+    loop_count = int(face_sizes.sum())
+
+    # merge vertices with the same position and normal
+    unique, remap, merged = weld.weld_vertices(model.vertices, model.normals, weld_tolerance)
+
+    return MeshGeometry(vertices=model.vertices[unique],
+                        loop_vertices=remap[:loop_count],
+                        face_sizes=face_sizes,
+                        face_materials=face_materials,
+                        materials=model.texture_ids.tolist(),
+                        loop_uvs=model.uvs[:loop_count],
+                        loop_colors=model.colors[:loop_count],
+                        welded=merged)
+
+
+def from_td6_model(model, weld_tolerance=0.0):
+    # merge vertices with the same position and normal
+    unique, remap, merged = weld.weld_vertices(model.vertices, model.normals, weld_tolerance)
+    loop_source = model.triangles.ravel()
+
+    return MeshGeometry(vertices=model.vertices[unique],
+                        loop_vertices=remap[loop_source],
+                        face_sizes=np.full(len(model.triangles), 3, dtype=np.int32),
+                        face_materials=model.triangle_submeshes,
+                        materials=model.texture_numbers.tolist(),
+                        loop_uvs=model.uvs[loop_source],
+                        loop_colors=model.colors[loop_source] if model.colors is not None else None,
+                        welded=merged)
+
+
+def from_tdo3_mesh(mesh):
+    # one material slot per material number up to the highest one used
+    loop_vertices = mesh.triangles.ravel()
+    vert_count = len(mesh.vertices)
+
+    # faces pointing past the vertex list are dropped by filter_faces, clamp
+    # them here so the uv lookup doesn't fail first
+    uv_lookup = np.minimum(loop_vertices, vert_count - 1)
+    material_count = int(mesh.face_materials.max()) + 1 if len(mesh.face_materials) else 0
+
+    return MeshGeometry(vertices=mesh.vertices,
+                        loop_vertices=loop_vertices,
+                        face_sizes=np.full(len(mesh.triangles), 3, dtype=np.int32),
+                        face_materials=mesh.face_materials,
+                        materials=list(range(material_count)),
+                        loop_uvs=mesh.uvs[uv_lookup])
+
+
+def strip_faces(strip_type, verts_a, verts_b, breadth, pb2):
+    # faces joining two rows of a collision strip, as (corners, material)
+    #Type 1 = even
+    #
+    #Type 2 = top right extends + 1 loop
+    #Type 3 = top left extends + 1 loop
+    #Type 4 = both top ends extend + 1 loop
+    #
+    #Type 5 = top right shrinks -1 loop
+    #Type 6 = top left shrinks - 1 loop
+    #Type 7 = both top ends shrink - 1 loop
+    #
+    #Type 8 = special: split begin
+    #Type 9 = special: begin of strip
+    #Type 10 = special: end of strip
+    #Type 11 = special: split end
+    faces = []
+
+    # find our common quad range
+    row0_offset = 1 if (strip_type == 6 or strip_type == 7) else 0
+    row1_offset = 1 if (strip_type == 3 or strip_type == 4) else 0
+    count = breadth
+    if strip_type == 2 or strip_type == 3 or strip_type == 5 or strip_type == 6:
+        count -= 1
+    elif strip_type == 4 or strip_type == 7:
+        count -= 2
+
+    # filler parts
+    if strip_type == 3 or strip_type == 4:
+        faces.append(((verts_a[0], verts_b[1], verts_b[0]), 0))
+    if strip_type == 6 or strip_type == 7:
+        faces.append(((verts_a[0], verts_a[1], verts_b[0]), 0))
+
+    # center quads, the material bits pick a material per quad
+    for x in range(count):
+        material = 1 if (pb2 & (1 << x)) != 0 else 0
+        faces.append(((verts_a[row0_offset + x], verts_a[row0_offset + x + 1],
+                       verts_b[row1_offset + x + 1], verts_b[row1_offset + x]), material))
+
+    # filler parts
+    if strip_type == 2 or strip_type == 4:
+        faces.append(((verts_a[-1], verts_b[-1], verts_b[-2]), 0))
+    if strip_type == 5 or strip_type == 7:
+        faces.append(((verts_a[-2], verts_a[-1], verts_b[-1]), 0))
+
+    return faces
+
+
+def from_td5_collision(collision):
+    # strips that share a row share its vertices, a vertex is identified by
+    # its position index and the offset of the strip using it
+    row_starts, row_counts, row_indices, row_offsets = td5.strip_rows(collision)
+
+    keys = np.column_stack((row_indices, row_offsets))
+    unique_keys, remap = np.unique(keys, axis=0, return_inverse=True)
+    remap = remap.reshape(-1).astype(np.int32)
+    vertices = axes.translate_vertices(collision.positions[unique_keys[:, 0]].astype(np.int64) + unique_keys[:, 1:])
+
+    loop_vertices = []
+    face_sizes = []
+    face_materials = []
+
+    strips = collision.strips
+    used = td5.used_strips(collision).tolist()
+    remap_list = remap.tolist()
+    for x, (strip_type, strip_flags, materials) in enumerate(zip(strips['type'].tolist(), strips['flags'].tolist(), strips['materials'].tolist())):
+        if not used[x]:
+            continue
+
+        (start_a, start_b), (count_a, count_b) = row_starts[x].tolist(), row_counts[x].tolist()
+        verts_a = remap_list[start_a:start_a + count_a]
+        verts_b = remap_list[start_b:start_b + count_b]
+
+        for corners, material in strip_faces(strip_type, verts_a, verts_b, strip_flags & 0xF, materials):
+            loop_vertices += corners
+            face_sizes.append(len(corners))
+            face_materials.append(material)
+
+    return MeshGeometry(vertices=vertices,
+                        loop_vertices=np.array(loop_vertices, dtype=np.int32),
+                        face_sizes=np.array(face_sizes, dtype=np.int32),
+                        face_materials=np.array(face_materials, dtype=np.int32),
+                        materials=[],
+                        welded=len(keys) - len(unique_keys))
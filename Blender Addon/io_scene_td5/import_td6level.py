@@ -0,0 +1,219 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import time, os, logging
+import numpy as np
+
+from . import geometry, import_td6dat, model_cache, profiling
+from .formats import archive, td6
+from .session import ImportSession
+
+log = logging.getLogger(__name__)
+
+# models decoded or built per level import step
+LEVEL_BATCH_SIZE = 8
+
+######################################################
+# HELPERS
+######################################################
+def model_source(item, index):
+    # td5unpack names models after their offset in models.dat
+    try:
+        return int(os.path.splitext(item)[0], 16)
+    except ValueError:
+        return index
+
+######################################################
+# IMPORT
+######################################################
+def import_textures(textures_dir, session):
+    # load directory
+    dir_file = open(os.path.join(textures_dir, "textures.dir"), 'rb')
+    texture_dir = td6.read_texture_directory(dir_file.read())
+    dir_file.close()
+
+    texinfos = list(zip(texture_dir.filenames, texture_dir.alpha_types))
+
+    # only materials this import created, earlier imports already have textures
+    for texnum, mat in session.materials.items():
+        if texnum >= len(texinfos):
+            continue
+        texfile, alpha_type = texinfos[texnum]
+
+        texpath = os.path.join(textures_dir, texfile)
+        if os.path.isfile(texpath):
+            img = session.load_image(texpath)
+
+            tex_image_node = mat.node_tree.nodes.new('ShaderNodeTexImage')
+            tex_image_node.image = img
+
+            bsdf = mat.node_tree.nodes["Principled BSDF"]
+            mat.node_tree.links.new(bsdf.inputs['Base Color'], tex_image_node.outputs['Color'])
+
+            if alpha_type > 0:
+                mat.blend_method = 'CLIP'
+                mat.node_tree.links.new(bsdf.inputs['Alpha'], tex_image_node.outputs['Alpha'])
+
+
+def link_level_textures(level_dir, session):
+    textures_dir = os.path.join(level_dir, "textures")
+    if not os.path.isfile(os.path.join(textures_dir, "textures.dir")):
+        log.warning("Textures directory missing, textures will not be loaded.")
+        return
+    
+    log.info("Loading textures...")
+    import_textures(textures_dir, session)
+
+
+def level_directory(filepath):
+    # the level folder, whichever file in it was selected
+    selected_dir = filepath
+    if not os.path.isdir(selected_dir) and os.path.isfile(selected_dir):
+        selected_dir = os.path.dirname(os.path.abspath(filepath))
+    
+    models_dir = os.path.join(selected_dir, "models")
+    models_path = os.path.join(selected_dir, "models.dat")
+    if not os.path.exists(models_dir) and not os.path.isfile(models_path):
+        raise Exception("Neither a models directory nor a models.dat exists within this level direectory. Please run td5unpack on the models.dat file, or import the level folder containing it.")
+    return selected_dir
+
+######################################################
+# LEVEL IMPORT
+######################################################
+def level_steps(selected_dir,
+                session,
+                merge_models=False,
+                models_per_object=64,
+                cache=None,
+                batch_size=LEVEL_BATCH_SIZE):
+    # imports a level a batch of models at a time, yielding (steps done,
+    # step count) after each batch so the import can be spread over time
+    # slices. every model is one decode and one build step, and objects are
+    # built as soon as their models are decoded. closing the generator early
+    # keeps the objects built so far
+    log.info("Importing level " + selected_dir)
+    models_dir = os.path.join(selected_dir, "models")
+    models_path = os.path.join(selected_dir, "models.dat")
+    
+    # models come from td5unpack's models folder, or straight out of models.dat
+    use_archive = not os.path.exists(models_dir)
+    
+    # directory scan
+    if use_archive:
+        models = archive.ModelsArchive(models_path)
+        model_offsets = models.model_offsets.tolist()
+        obj_names = ["%04X" % o for o in model_offsets]
+        obj_sources = model_offsets
+        signature = model_cache.file_signature(models_path)
+        keys = [model_cache.make_key(signature, o, "td6 track") for o in model_offsets]
+    else:
+        models = None
+        file_list = sorted(os.listdir(models_dir))
+        obj_list = [item for item in file_list if item.endswith('.dat')]
+        obj_paths = [os.path.join(models_dir, item) for item in obj_list]
+        obj_names = [os.path.splitext(item)[0] for item in obj_list]
+        obj_sources = [model_source(item, i) for i, item in enumerate(obj_list)]
+        keys = [model_cache.make_key(model_cache.file_signature(path), 0, "td6 track") for path in obj_paths]
+    step_count = len(obj_names) * 2
+
+    # one object per model, or per N models
+    if not merge_models:
+        chunks = [[i] for i in range(len(obj_names))]
+    else:
+        chunks = geometry.group_runs(np.arange(len(obj_names)) // models_per_object)
+
+    def decode(indices):
+        decoded = []
+        for i in indices:
+            if use_archive:
+                decoded.append(import_td6dat.decode_model(models.model(i), True))
+            else:
+                with open(obj_paths[i], 'rb') as file:
+                    decoded.append(import_td6dat.decode_model(file.read(), True))
+        return decoded
+
+    # decode a batch, then build the objects whose models are all decoded
+    log.info("Importing %d models..." % len(obj_names))
+    decoded = []
+    built = 0
+    next_chunk = 0
+    try:
+        batches = model_cache.decode_batches(cache, keys, decode, batch_size)
+        while True:
+            with profiling.phase("decode"):
+                batch = next(batches, None)
+            if batch is None:
+                break
+            decoded += batch
+            
+            while next_chunk < len(chunks) and chunks[next_chunk][-1] < len(decoded):
+                chunk = chunks[next_chunk]
+                if not merge_models:
+                    geom, location = decoded[chunk[0]]
+                    import_td6dat.create_model_object(geom, obj_names[chunk[0]], location, session)
+                else:
+                    merged = geometry.merge_geometry([decoded[i][0] for i in chunk],
+                                                     [decoded[i][1] for i in chunk],
+                                                     [obj_sources[i] for i in chunk])
+                    import_td6dat.create_model_object(merged, "level_%03d" % next_chunk, None, session)
+                built += len(chunk)
+                next_chunk += 1
+            yield len(decoded) + built, step_count
+    finally:
+        if models is not None:
+            models.close()
+
+    # texture link
+    with profiling.phase("texture"):
+        link_level_textures(selected_dir, session)
+    yield step_count, step_count
+
+######################################################
+# IMPORT
+######################################################
+def load_level(filepath,
+               context,
+               merge_models=False,
+               models_per_object=64,
+               cache=None,
+               placeholders_only=False):
+
+    selected_dir = level_directory(filepath)
+    time1 = time.perf_counter()
+    
+    if placeholders_only:
+        # just the bounds of each model, full models are loaded on demand
+        from . import level_streaming
+        log.info("Importing level placeholders " + selected_dir)
+        with profiling.phase("placeholders"):
+            level_streaming.create_placeholders(context, 'TD6', selected_dir, os.path.basename(os.path.normpath(selected_dir)))
+    else:
+        for _ in level_steps(selected_dir, ImportSession(), merge_models, models_per_object, cache):
+            pass
+
+    log.info(" done in %.4f sec." % (time.perf_counter() - time1))
+
+
+def load(operator,
+         context,
+         filepath="",
+         merge_models=False,
+         models_per_object=64,
+         placeholders_only=False,
+         ):
+
+    load_level(filepath,
+               context,
+               merge_models,
+               models_per_object,
+               model_cache.user_cache(context),
+               placeholders_only,
+               )
+
+    return {'FINISHED'}
@@ -0,0 +1,276 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import model_cache, utils
+from .formats import archive, axes, tdo3
+
+log = logging.getLogger(__name__)
+
+# bump whenever the layout of the sidecar changes
+INDEX_VERSION = 1
+
+INDEX_FILENAME = "td5_level_index.npz"
+
+# grids never get more cells than this along either axis
+MAX_GRID_CELLS = 256
+
+######################################################
+# INDEX
+######################################################
+@dataclass
+class LevelIndex:
+    """Uniform XY grid over the bounding boxes of a level's models, in Blender space"""
+    signature: str
+    names: np.ndarray
+    sources: np.ndarray
+    offsets: np.ndarray
+    box_min: np.ndarray
+    box_max: np.ndarray
+    origin: np.ndarray
+    cell_size: float
+    dims: np.ndarray
+    cell_starts: np.ndarray
+    cell_items: np.ndarray
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def cell_range(self, box_min, box_max):
+        # inclusive (x, y) cell ranges (low, high) covering boxes, clamped to the grid
+        low = np.floor((np.asarray(box_min)[..., :2] - self.origin) / self.cell_size).astype(np.int64)
+        high = np.floor((np.asarray(box_max)[..., :2] - self.origin) / self.cell_size).astype(np.int64)
+        low = np.clip(low, 0, self.dims - 1)
+        high = np.clip(high, 0, self.dims - 1)
+        return low, high
+
+    def candidates(self, box_min, box_max):
+        # models registered in any cell the box touches
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64)
+        (x0, y0), (x1, y1) = self.cell_range(box_min, box_max)
+        cells = (np.arange(y0, y1 + 1)[:, None] * self.dims[0] + np.arange(x0, x1 + 1)[None, :]).ravel()
+        items = [self.cell_items[self.cell_starts[c]:self.cell_starts[c + 1]] for c in cells]
+        return np.unique(np.concatenate(items)) if len(items) > 0 else np.zeros(0, dtype=np.int64)
+
+    def query_box(self, box_min, box_max):
+        # indices of models whose bounds intersect the box
+        box_min = np.asarray(box_min, dtype=np.float64)
+        box_max = np.asarray(box_max, dtype=np.float64)
+        found = self.candidates(box_min, box_max)
+        overlap = ((self.box_min[found] <= box_max) & (self.box_max[found] >= box_min)).all(axis=1)
+        return found[overlap]
+
+    def query_radius(self, point, radius):
+        # indices of models whose bounds come within radius of point
+        point = np.asarray(point, dtype=np.float64)
+        found = self.candidates(point - radius, point + radius)
+        nearest = np.clip(point, self.box_min[found], self.box_max[found])
+        return found[np.linalg.norm(nearest - point, axis=1) <= radius]
+
+    def cell_groups(self):
+        # model indices grouped by the cell holding the center of their bounds,
+        # for merging models that are near each other
+        if len(self) == 0:
+            return []
+        centers = (self.box_min + self.box_max) * 0.5
+        cell, _ = self.cell_range(centers, centers)
+        cells = cell[:, 1] * self.dims[0] + cell[:, 0]
+        order = np.argsort(cells, kind='stable')
+        breaks = np.flatnonzero(np.diff(cells[order])) + 1
+        return np.split(order, breaks)
+
+
+def build_index(box_min, box_max, names, sources, offsets, signature="", cell_size=None):
+    # registers every model in each cell its bounds overlap. the default cell
+    # size gives roughly one model per cell on a square level
+    box_min = np.asarray(box_min, dtype=np.float64).reshape(-1, 3)
+    box_max = np.asarray(box_max, dtype=np.float64).reshape(-1, 3)
+    count = len(box_min)
+
+    if count > 0:
+        origin = box_min[:, :2].min(axis=0)
+        extent = box_max[:, :2].max(axis=0) - origin
+    else:
+        origin = np.zeros(2)
+        extent = np.zeros(2)
+
+    if cell_size is None:
+        cell_size = float(extent.max()) / max(1, int(np.sqrt(count)))
+    cell_size = max(cell_size, float(extent.max()) / MAX_GRID_CELLS, 1e-3)
+    dims = np.maximum(np.ceil(extent / cell_size).astype(np.int64), 1)
+
+    index = LevelIndex(signature=signature,
+                       names=np.asarray(names, dtype=str),
+                       sources=np.asarray(sources, dtype=str),
+                       offsets=np.asarray(offsets, dtype=np.int64),
+                       box_min=box_min,
+                       box_max=box_max,
+                       origin=origin,
+                       cell_size=cell_size,
+                       dims=dims,
+                       cell_starts=np.zeros(dims[0] * dims[1] + 1, dtype=np.int64),
+                       cell_items=np.zeros(0, dtype=np.int64))
+    if count == 0:
+        return index
+
+    # expand each model into the cells of its range
+    low, high = index.cell_range(box_min, box_max)
+    span = high - low + 1
+    counts = span[:, 0] * span[:, 1]
+    items = np.repeat(np.arange(count), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cell_x = low[items, 0] + local % span[items, 0]
+    cell_y = low[items, 1] + local // span[items, 0]
+    cells = cell_y * dims[0] + cell_x
+
+    order = np.argsort(cells, kind='stable')
+    index.cell_items = items[order]
+    index.cell_starts[1:] = np.cumsum(np.bincount(cells, minlength=dims[0] * dims[1]))
+    return index
+
+######################################################
+# SIDECAR
+######################################################
+def save_index(filepath, index):
+    try:
+        with utils.atomic_path(filepath) as temp_path, open(temp_path, 'wb') as file:
+            np.savez(file,
+                     version=np.array(INDEX_VERSION),
+                     signature=np.array(index.signature),
+                     names=index.names,
+                     sources=index.sources,
+                     offsets=index.offsets,
+                     box_min=index.box_min,
+                     box_max=index.box_max,
+                     origin=index.origin,
+                     cell_size=np.array(index.cell_size),
+                     dims=index.dims,
+                     cell_starts=index.cell_starts,
+                     cell_items=index.cell_items)
+    except OSError as e:
+        log.warning("Failed to write level index %s: %s" % (filepath, e))
+
+
+def read_index(filepath):
+    # returns the saved index, or None if it's missing or from another version
+    try:
+        with np.load(filepath, allow_pickle=False) as arrays:
+            if int(arrays["version"]) != INDEX_VERSION:
+                return None
+            return LevelIndex(signature=str(arrays["signature"]),
+                              names=arrays["names"],
+                              sources=arrays["sources"],
+                              offsets=arrays["offsets"],
+                              box_min=arrays["box_min"],
+                              box_max=arrays["box_max"],
+                              origin=arrays["origin"],
+                              cell_size=float(arrays["cell_size"]),
+                              dims=arrays["dims"],
+                              cell_starts=arrays["cell_starts"],
+                              cell_items=arrays["cell_items"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+######################################################
+# LEVELS
+######################################################
+def level_sources(model_format, level_path):
+    # the files a level's models are read from
+    models_dir = os.path.join(level_path, "models")
+    if model_format == 'TD6' and os.path.isdir(models_dir):
+        names = sorted(name for name in os.listdir(models_dir) if name.endswith('.dat'))
+        return [os.path.join(models_dir, name) for name in names]
+    if model_format == 'TDO3':
+        return [level_path]
+    return [os.path.join(level_path, "models.dat")]
+
+
+def level_signature(model_format, sources):
+    text = "|".join([model_format] + [model_cache.file_signature(source) for source in sources])
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def sphere_boxes(radii, centers):
+    # game unit bounding spheres to Blender space boxes
+    radii = np.asarray(radii, dtype=np.float64)[:, None] * 0.01
+    centers = axes.translate_vertices(np.asarray(centers, dtype=np.float32).reshape(-1, 3)).astype(np.float64)
+    return centers - radii, centers + radii
+
+
+def tdo3_boxes(meshes):
+    # mesh bounds are relative to the mesh and go through the axis swap, so
+    # the corners are sorted again after moving them into place
+    if len(meshes) == 0:
+        return np.zeros((0, 3)), np.zeros((0, 3))
+    locations = np.array([mesh.location for mesh in meshes], dtype=np.float64)
+    corner_a = np.array([mesh.bbox_min for mesh in meshes], dtype=np.float64) + locations
+    corner_b = np.array([mesh.bbox_max for mesh in meshes], dtype=np.float64) + locations
+    return np.minimum(corner_a, corner_b), np.maximum(corner_a, corner_b)
+
+
+def level_entries(model_format, level_path):
+    # (names, sources, offsets, box_min, box_max) of every model of a level,
+    # reading as little as each format allows. level_path is the level
+    # directory, or the .mp file for Off-Road 3
+    sources = level_sources(model_format, level_path)
+
+    if model_format == 'TDO3':
+        with open(level_path, 'rb') as file:
+            meshes = tdo3.read_track(file.read())
+        base_name = os.path.splitext(os.path.basename(level_path))[0]
+        box_min, box_max = tdo3_boxes(meshes)
+        names = ["%s_%03d" % (base_name, i) for i in range(len(meshes))]
+        return names, [level_path] * len(meshes), list(range(len(meshes))), box_min, box_max
+
+    if model_format == 'TD6' and os.path.isdir(os.path.join(level_path, "models")):
+        # td5unpack'd, one model per file, only the headers are read
+        headers = []
+        for path in sources:
+            with open(path, 'rb') as file:
+                headers.append(file.read(28))
+        radii, centers = archive.read_model_bounds(b''.join(headers), [i * 28 for i in range(len(headers))])
+        names = [os.path.splitext(os.path.basename(path))[0] for path in sources]
+        return (names, sources, [0] * len(sources)) + sphere_boxes(radii, centers)
+
+    models_path = sources[0]
+    with archive.ModelsArchive(models_path) as models:
+        offsets = models.model_offsets.tolist()
+        radii, centers = models.model_bounds()
+    names = ["%04X" % o for o in offsets]
+    return (names, [models_path] * len(offsets), offsets) + sphere_boxes(radii, centers)
+
+
+def index_path(level_path):
+    if os.path.isdir(level_path):
+        return os.path.join(level_path, INDEX_FILENAME)
+    return os.path.splitext(level_path)[0] + "_" + INDEX_FILENAME
+
+
+def load_level_index(model_format, level_path):
+    # the level's sidecar index, rebuilt and saved again whenever any of its
+    # model files changed
+    signature = level_signature(model_format, level_sources(model_format, level_path))
+    sidecar = index_path(level_path)
+
+    index = read_index(sidecar)
+    if index is not None and index.signature == signature:
+        return index
+
+    names, sources, offsets, box_min, box_max = level_entries(model_format, level_path)
+    index = build_index(box_min, box_max, names, sources, offsets, signature)
+    save_index(sidecar, index)
+    log.info("Indexed %d models into a %dx%d grid" % (len(index), index.dims[0], index.dims[1]))
+    return index
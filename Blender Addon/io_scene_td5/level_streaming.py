@@ -0,0 +1,147 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import bpy
+import logging
+
+from . import decoding, import_td5dat, import_td6dat, import_td6level, level_index, model_cache, profiling
+from .formats import archive
+from .session import ImportSession
+
+log = logging.getLogger(__name__)
+
+# custom properties placeholders carry
+PROP_FORMAT = "TD5ModelFormat"
+PROP_SOURCE = "TD5ModelSource"
+PROP_OFFSET = "TD5ModelOffset"
+PROP_LEVEL = "TD5LevelDir"
+PROP_WELD = "TD5WeldTolerance"
+
+######################################################
+# HELPERS
+######################################################
+def placeholder_objects(objects):
+    return [ob for ob in objects if ob.type == 'EMPTY' and PROP_SOURCE in ob]
+
+
+def placeholders_near(objects, point, radius):
+    # placeholders whose model bounds come within radius of point, looked up
+    # in each level's index instead of testing every placeholder
+    levels = {}
+    for ob in placeholder_objects(objects):
+        levels.setdefault((ob[PROP_FORMAT], ob[PROP_LEVEL]), {})[(ob[PROP_SOURCE], ob[PROP_OFFSET])] = ob
+
+    near = []
+    for (model_format, level_dir), by_model in levels.items():
+        index = level_index.load_level_index(model_format, level_dir)
+        for i in index.query_radius(point, radius).tolist():
+            ob = by_model.get((str(index.sources[i]), int(index.offsets[i])))
+            if ob is not None:
+                near.append(ob)
+    return near
+
+######################################################
+# PLACEHOLDERS
+######################################################
+def create_placeholders(context, model_format, level_dir, name, weld_tolerance=0.0):
+    # one sphere empty per model, sized and placed from its header bounds
+    index = level_index.load_level_index(model_format, level_dir)
+    centers = (index.box_min + index.box_max) * 0.5
+    radii = (index.box_max - index.box_min).max(axis=1) * 0.5
+
+    collection = bpy.data.collections.new(name + "_placeholders")
+    context.scene.collection.children.link(collection)
+
+    entries = zip(index.names.tolist(), index.sources.tolist(), index.offsets.tolist())
+    for (model_name, source, offset), radius, center in zip(entries, radii.tolist(), centers.tolist()):
+        ob = bpy.data.objects.new(model_name, None)
+        ob.empty_display_type = 'SPHERE'
+        ob.empty_display_size = max(radius, 0.01)
+        ob.location = center
+
+        ob[PROP_FORMAT] = model_format
+        ob[PROP_SOURCE] = source
+        ob[PROP_OFFSET] = offset
+        ob[PROP_LEVEL] = level_dir
+        ob[PROP_WELD] = weld_tolerance
+        collection.objects.link(ob)
+
+    log.info("Created %d placeholders" % len(index))
+    return collection
+
+
+def decode_placeholders(model_format, source, offsets, weld_tolerance, cache):
+    # decodes the models at the given offsets of one source file, with the
+    # same cache keys a full level import uses
+    if source.endswith("models.dat"):
+        models = archive.ModelsArchive(source)
+        indices = {o: i for i, o in enumerate(models.model_offsets.tolist())}
+
+        def read(offset):
+            return models.model(indices[offset])
+    else:
+        models = None
+
+        def read(offset):
+            with open(source, 'rb') as file:
+                return file.read()
+
+    if model_format == 'TD5':
+        def decode_one(data):
+            return decoding.decode_td5_model(data, weld_tolerance)
+        settings = ("td5", weld_tolerance)
+    else:
+        def decode_one(data):
+            return import_td6dat.decode_model(data, True)
+        settings = ("td6 track",)
+
+    signature = model_cache.file_signature(source)
+    keys = [model_cache.make_key(signature, o, *settings) for o in offsets]
+    try:
+        with profiling.phase("decode"):
+            return model_cache.decode_cached(cache, keys, lambda missing: [decode_one(read(offsets[i])) for i in missing])
+    finally:
+        if models is not None:
+            models.close()
+
+
+def link_level_textures(model_format, level_dir, session):
+    if model_format == 'TD5':
+        import_td5dat.link_level_textures(level_dir, session)
+    else:
+        import_td6level.link_level_textures(level_dir, session)
+
+
+def load_placeholders(context, placeholders):
+    # swaps placeholders for their full models, returns the created objects
+    cache = model_cache.user_cache(context)
+
+    groups = {}
+    for ob in placeholders:
+        key = (ob[PROP_FORMAT], ob[PROP_LEVEL], ob[PROP_SOURCE], ob.get(PROP_WELD, 0.0))
+        groups.setdefault(key, []).append(ob)
+
+    created = []
+    sessions = {}
+    for (model_format, level_dir, source, weld_tolerance), obs in groups.items():
+        decoded = decode_placeholders(model_format, source, [ob[PROP_OFFSET] for ob in obs], weld_tolerance, cache)
+        session = sessions.setdefault((model_format, level_dir), ImportSession())
+        create_model_object = import_td5dat.create_model_object if model_format == 'TD5' else import_td6dat.create_model_object
+
+        for ob, (geom, location) in zip(obs, decoded):
+            name = ob.name
+            bpy.data.objects.remove(ob)
+            created.append(create_model_object(geom, name, location, session))
+
+    with profiling.phase("texture"):
+        for (model_format, level_dir), session in sessions.items():
+            link_level_textures(model_format, level_dir, session)
+
+    log.info("Loaded %d models" % len(created))
+    return created
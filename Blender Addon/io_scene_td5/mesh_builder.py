@@ -0,0 +1,171 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import bpy, bmesh
+import logging
+import numpy as np
+
+from .geometry import face_loop_starts, filter_faces
+
+log = logging.getLogger(__name__)
+
+######################################################
+# HELPERS
+######################################################
+def color_layer_new(me, name="Col"):
+    # returns (layer, property name) for a byte colour corner layer, the same
+    # kind of layer bm.loops.layers.color creates
+    if hasattr(me, "color_attributes"):
+        layer = me.color_attributes.new(name, 'BYTE_COLOR', 'CORNER')
+        if "color_srgb" in bpy.types.ByteColorAttributeValue.bl_rna.properties:
+            return layer, "color_srgb"
+        return layer, "color"
+    return me.vertex_colors.new(name=name), "color"
+
+
+def color_layer_active(me):
+    # returns (layer, property name) for the colour layer that
+    # bm.loops.layers.color.active would give, or (None, None). values are
+    # the stored bytes / 255 like bmesh hands them out
+    if hasattr(me, "vertex_colors"):
+        layer = me.vertex_colors.active
+        return (layer, "color") if layer is not None else (None, None)
+
+    layer = me.color_attributes.active_color
+    if layer is None or layer.data_type != 'BYTE_COLOR' or layer.domain != 'CORNER':
+        layer = next((attr for attr in me.color_attributes if attr.data_type == 'BYTE_COLOR' and attr.domain == 'CORNER'), None)
+    return (layer, "color_srgb") if layer is not None else (None, None)
+
+
+def set_polygon_sizes(me, face_sizes):
+    # loop_total is derived from loop_start in newer versions of Blender
+    if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+        me.polygons.foreach_set("loop_total", face_sizes)
+
+######################################################
+# BUILDERS
+######################################################
+def build_mesh_foreach(me, vertices, loop_vertices, face_sizes, face_materials, loop_uvs, loop_colors, face_attributes):
+    me.vertices.add(len(vertices))
+    me.vertices.foreach_set("co", vertices.ravel())
+
+    me.loops.add(len(loop_vertices))
+    me.loops.foreach_set("vertex_index", loop_vertices)
+
+    me.polygons.add(len(face_sizes))
+    me.polygons.foreach_set("loop_start", face_loop_starts(face_sizes))
+    set_polygon_sizes(me, face_sizes)
+    me.polygons.foreach_set("use_smooth", np.ones(len(face_sizes), dtype=bool))
+    if face_materials is not None:
+        me.polygons.foreach_set("material_index", face_materials)
+
+    if loop_uvs is not None:
+        uv_layer = me.uv_layers.new()
+        uv_layer.data.foreach_set("uv", loop_uvs.ravel())
+
+    if loop_colors is not None:
+        vc_layer, vc_prop = color_layer_new(me)
+        vc_layer.data.foreach_set(vc_prop, loop_colors.ravel())
+
+    for name, values in face_attributes.items():
+        attribute = me.attributes.new(name, 'INT', 'FACE')
+        attribute.data.foreach_set("value", values)
+
+    me.update(calc_edges=True)
+
+
+def build_mesh_bmesh(me, vertices, loop_vertices, face_sizes, face_materials, loop_uvs, loop_colors, face_attributes):
+    bm = bmesh.new()
+    bm.from_mesh(me)
+
+    uv_layer = bm.loops.layers.uv.new() if loop_uvs is not None else None
+    vc_layer = bm.loops.layers.color.new() if loop_colors is not None else None
+    face_layers = [(bm.faces.layers.int.new(name), values.tolist()) for name, values in face_attributes.items()]
+
+    bmverts = [bm.verts.new(co) for co in vertices.tolist()]
+    loop_vertices = loop_vertices.tolist()
+    face_sizes = face_sizes.tolist()
+    face_materials = face_materials.tolist() if face_materials is not None else None
+    loop_uvs = loop_uvs.tolist() if loop_uvs is not None else None
+    loop_colors = loop_colors.tolist() if loop_colors is not None else None
+
+    loop_index = 0
+    for face_index, face_size in enumerate(face_sizes):
+        face_loops = range(loop_index, loop_index + face_size)
+        face = bm.faces.new([bmverts[loop_vertices[i]] for i in face_loops])
+        face.smooth = True
+        if face_materials is not None:
+            face.material_index = face_materials[face_index]
+        for face_layer, values in face_layers:
+            face[face_layer] = values[face_index]
+
+        for loop, i in zip(face.loops, face_loops):
+            if uv_layer is not None:
+                loop[uv_layer].uv = loop_uvs[i]
+            if vc_layer is not None:
+                loop[vc_layer] = loop_colors[i]
+
+        loop_index += face_size
+
+    bm.normal_update()
+    bm.to_mesh(me)
+    bm.free()
+
+
+def build_mesh(me, vertices, loop_vertices, face_sizes, face_materials=None,
+               loop_uvs=None, loop_colors=None, face_attributes=None, use_bmesh=False):
+    # vertices: (V, 3) positions
+    # loop_vertices: vertex index of every face corner, faces stored back to back
+    # face_sizes: corner count of each face
+    # loop_uvs / loop_colors: (L, 2) / (L, 4) per corner data, optional
+    # face_attributes: {name: (F,) ints} stored as integer face attributes, optional
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+    loop_vertices = np.ascontiguousarray(loop_vertices, dtype=np.int32)
+    face_sizes = np.ascontiguousarray(face_sizes, dtype=np.int32)
+    face_attributes = dict(face_attributes) if face_attributes is not None else {}
+
+    # drop faces bmesh would refuse, along with their corners
+    keep = filter_faces(loop_vertices, face_sizes, len(vertices))
+    if not keep.all():
+        log.debug("Skipping %d degenerate or duplicate faces" % (len(keep) - np.count_nonzero(keep)))
+        keep_loops = np.repeat(keep, face_sizes)
+        loop_vertices = loop_vertices[keep_loops]
+        face_sizes = face_sizes[keep]
+        if face_materials is not None:
+            face_materials = np.asarray(face_materials)[keep]
+        if loop_uvs is not None:
+            loop_uvs = np.asarray(loop_uvs)[keep_loops]
+        if loop_colors is not None:
+            loop_colors = np.asarray(loop_colors)[keep_loops]
+        for name, values in face_attributes.items():
+            face_attributes[name] = np.asarray(values)[keep]
+
+    if face_materials is not None:
+        face_materials = np.ascontiguousarray(face_materials, dtype=np.int32)
+    if loop_uvs is not None:
+        loop_uvs = np.ascontiguousarray(loop_uvs, dtype=np.float32)
+    if loop_colors is not None:
+        loop_colors = np.ascontiguousarray(loop_colors, dtype=np.float32)
+    for name, values in face_attributes.items():
+        face_attributes[name] = np.ascontiguousarray(values, dtype=np.int32)
+
+    builder = build_mesh_bmesh if use_bmesh else build_mesh_foreach
+    builder(me, vertices, loop_vertices, face_sizes, face_materials, loop_uvs, loop_colors, face_attributes)
+
+
+def build_geometry(me, geometry, use_bmesh=False):
+    build_mesh(me,
+               geometry.vertices,
+               geometry.loop_vertices,
+               geometry.face_sizes,
+               geometry.face_materials,
+               geometry.loop_uvs,
+               geometry.loop_colors,
+               geometry.face_attributes,
+               use_bmesh)
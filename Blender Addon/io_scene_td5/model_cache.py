@@ -0,0 +1,210 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import hashlib
+import logging
+import os
+import zipfile
+
+import numpy as np
+
+from . import utils
+from .geometry import MeshGeometry
+
+log = logging.getLogger(__name__)
+
+# bump whenever parsing, welding or MeshGeometry changes so that stale
+# entries written by older versions are never read back
+PARSER_VERSION = 1
+
+CACHE_EXTENSION = ".npz"
+
+######################################################
+# KEYS
+######################################################
+def file_signature(filepath):
+    # identifies a source file by where it is and when it last changed
+    stat = os.stat(filepath)
+    return "%s|%d|%d" % (os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns)
+
+
+def make_key(signature, offset, *settings):
+    # settings are anything else that changes the decoded result, like the
+    # model kind or the weld tolerance
+    text = "%d|%s|%d|%s" % (PARSER_VERSION, signature, offset, "|".join(repr(s) for s in settings))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+######################################################
+# SERIALIZATION
+######################################################
+def pack_entry(geom, location):
+    arrays = {
+        "vertices": geom.vertices,
+        "loop_vertices": geom.loop_vertices,
+        "face_sizes": geom.face_sizes,
+        "face_materials": geom.face_materials,
+        "materials": np.array(geom.materials, dtype=np.int64),
+        "welded": np.array(geom.welded, dtype=np.int64),
+    }
+    if geom.loop_uvs is not None:
+        arrays["loop_uvs"] = geom.loop_uvs
+    if geom.loop_colors is not None:
+        arrays["loop_colors"] = geom.loop_colors
+    if geom.face_attributes is not None:
+        for name, values in geom.face_attributes.items():
+            arrays["attr_" + name] = values
+    if location is not None:
+        arrays["location"] = np.array(location, dtype=np.float64)
+    return arrays
+
+
+def unpack_entry(arrays):
+    face_attributes = {name[5:]: arrays[name] for name in arrays.files if name.startswith("attr_")}
+    geom = MeshGeometry(vertices=arrays["vertices"],
+                        loop_vertices=arrays["loop_vertices"],
+                        face_sizes=arrays["face_sizes"],
+                        face_materials=arrays["face_materials"],
+                        materials=arrays["materials"].tolist(),
+                        loop_uvs=arrays["loop_uvs"] if "loop_uvs" in arrays.files else None,
+                        loop_colors=arrays["loop_colors"] if "loop_colors" in arrays.files else None,
+                        face_attributes=face_attributes or None,
+                        welded=int(arrays["welded"]))
+    location = tuple(arrays["location"].tolist()) if "location" in arrays.files else None
+    return geom, location
+
+######################################################
+# CACHE
+######################################################
+class GeometryCache:
+    """Decoded model geometry stored as .npz files, evicted least recently used first"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + CACHE_EXTENSION)
+
+    def get(self, key):
+        # returns (geometry, location) or None
+        path = self.entry_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                entry = unpack_entry(arrays)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            # truncated or edited entries count as a miss and are dropped
+            log.warning("Removing unreadable cache entry %s: %s" % (key, e))
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        
+        # mtime doubles as the last use time for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, geom, location=None):
+        try:
+            with utils.atomic_path(self.entry_path(key)) as temp_path, open(temp_path, 'wb') as file:
+                np.savez(file, **pack_entry(geom, location))
+        except OSError as e:
+            log.warning("Failed to write cache entry %s: %s" % (key, e))
+
+    def entries(self):
+        # (path, size, last use) of every entry
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(CACHE_EXTENSION):
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def trim(self):
+        # drop least recently used entries until the cache fits
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        removed = 0
+        for path, _, _ in self.entries():
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+def decode_batches(cache, keys, decode, batch_size=None):
+    # Decode a batch of keys at a time, like decode_cached, and yield the
+    # results of each batch in order. the cache is trimmed once, after the
+    # last batch
+    batch_size = batch_size or max(len(keys), 1)
+    hits = 0
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        if cache is None:
+            yield decode(list(range(start, start + len(batch))))
+            continue
+
+        results = [cache.get(key) for key in batch]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if len(missing) > 0:
+            for i, result in zip(missing, decode([start + i for i in missing])):
+                results[i] = result
+                cache.put(batch[i], *result)
+        hits += len(batch) - len(missing)
+        yield results
+
+    if cache is not None:
+        if hits < len(keys):
+            cache.trim()
+        log.info("Model cache: %d hits, %d decoded" % (hits, len(keys) - hits))
+
+
+def decode_cached(cache, keys, decode):
+    # decode(indices) decodes the given positions of keys and returns a list
+    # of (geometry, location). only entries missing from the cache are decoded
+    return [result for batch in decode_batches(cache, keys, decode) for result in batch]
+
+######################################################
+# BLENDER
+######################################################
+def cache_directory():
+    import bpy
+    return os.path.join(bpy.utils.user_resource('CONFIG', path=__package__, create=True), "model_cache")
+
+
+def user_cache(context):
+    # the cache configured in the add-on preferences, None if it's disabled
+    addon = context.preferences.addons.get(__package__)
+    if addon is None or not addon.preferences.use_cache:
+        return None
+    return GeometryCache(cache_directory(), addon.preferences.cache_size * 1024 * 1024)
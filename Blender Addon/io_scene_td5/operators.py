@@ -0,0 +1,533 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import os
+import bpy
+
+from . import background_import, profiling
+
+from bpy.props import (
+        BoolProperty,
+        EnumProperty,
+        FloatProperty,
+        IntProperty,
+        StringProperty,
+        )
+
+from bpy_extras.io_utils import (
+        ImportHelper,
+        ExportHelper,
+        )
+
+##class ImportTD5Level(bpy.types.Operator, ImportHelper):
+##    """Import an entire level from Test Drive 5"""
+##    bl_idname = "import_scene.td5level"
+##    bl_label = 'Import Test Drive 5 Level'
+##    bl_optoins = {'UNDO'}
+##    
+##    filename_ext = "*"
+##    filter_glob: StringProperty(default="*", options={'HIDDEN'})
+##    
+##    def execute(self, context):
+##        selected_dir = self.filepath
+##        if not os.path.isdir(selected_dir) and os.path.isfile(selected_dir):
+##            selected_dir = os.path.dirname(os.path.abspath(self.filepath))
+##        
+##        models_dir = os.path.join(selected_dir, "models")
+##        textures_dir = os.path.join(selected_dir, "textures")
+##        textures_dir_exists = os.path.exists(textures_dir)
+##        
+##        if not os.path.exists(models_dir):
+##            raise Exception("Models directory does not exist within this level direectory. Please run td5unpack on the models.dat file, and optionally the textures.dat file.")
+##        if not textures_dir_exists:
+##            print("Textures directory missing, textures will not be loaded.")
+##            
+##        print("Importing level " + selected_dir)
+##        print("Importing models...")
+##        
+##        # import models
+##        file_list = sorted(os.listdir(models_dir))
+##        obj_list = [item for item in file_list if item.endswith('.dat')]
+##
+##        for item in obj_list:
+##            path_to_file = os.path.join(models_dir, item)
+##            bpy.ops.import_mesh.td5dat(filepath = path_to_file)
+##            
+##        # load in textures
+##        if textures_dir_exists:
+##            print("Loading textures...")
+##            
+##            for mat in bpy.data.materials:
+##                if mat.name.startswith("TD5Material"):
+##                    texnum = mat.name[12:]
+##                    texpath = os.path.join(textures_dir, "texture_" + texnum + ".png")
+##                    if os.path.isfile(texpath):
+##                        img = bpy.data.images.load(texpath)
+##                        
+##                        tex_image_node = mat.node_tree.nodes.new('ShaderNodeTexImage')
+##                        tex_image_node.image = img
+##                        
+##                        bsdf = mat.node_tree.nodes["Principled BSDF"]
+##                        mat.node_tree.links.new(bsdf.inputs['Base Color'], tex_image_node.outputs['Color'])
+##         
+##        print("Level import complete")
+##        return {'FINISHED'}
+    
+
+class ImportTD5DAT(bpy.types.Operator, background_import.TimeSlicedImport, ImportHelper):
+    """Import from Test Drive 5 file format (.dat)"""
+    bl_idname = "import_mesh.td5dat"
+    bl_label = 'Import Test Drive 5 DAT'
+    bl_options = {'UNDO'}
+
+    filename_ext = ".dat"
+    filter_glob: StringProperty(default="*.dat;*.prr", options={'HIDDEN'})
+
+    weld_tolerance: FloatProperty(
+        name="Weld Tolerance",
+        description="Vertices closer than this are merged when welding. 0 only merges exact duplicates",
+        default=0.0,
+        min=0.0,
+        precision=4,
+        )
+        
+    workers: IntProperty(
+        name="Worker Processes",
+        description="Number of processes used to decode models when importing a level (levelinf.dat). 0 decodes everything in Blender's own process",
+        default=0,
+        min=0,
+        max=64,
+        )
+        
+    merge_mode: EnumProperty(
+        name="Merge Level Models",
+        description="How models are combined into objects when importing a level (levelinf.dat)",
+        items=(('NONE', "Separate Objects", "One object per model"),
+               ('GROUP', "Per Model Group", "One object per models.dat group"),
+               ('COUNT', "Per N Models", "One object per Models Per Object models"),
+               ('REGION', "Per Region", "One object per cell of a grid laid over the level")),
+        default='NONE',
+        )
+        
+    models_per_object: IntProperty(
+        name="Models Per Object",
+        description="Number of models merged into each object when merging per N models",
+        default=64,
+        min=1,
+        )
+        
+    atlas_textures: BoolProperty(
+        name="Texture Atlas",
+        description="Pack level textures from textures.dat into a few shared images. Textures that repeat keep their own material",
+        default=False,
+        )
+        
+    placeholders_only: BoolProperty(
+        name="Placeholders Only",
+        description="Import a level (levelinf.dat) as one sphere empty per model. Full models are loaded later with Object > Load Level Models",
+        default=False,
+        )
+        
+    background: BoolProperty(
+        name="Import in Background",
+        description="Import a level (levelinf.dat) a few models at a time so Blender stays usable. Press Esc to stop, the models imported so far are kept. Imports run from scripts always finish before returning",
+        default=True,
+        )
+        
+    def execute(self, context):
+        from . import import_td5dat, model_cache
+        from .session import ImportSession
+        keywords = self.as_keywords(ignore=("axis_forward",
+                                            "axis_up",
+                                            "filter_glob",
+                                            "check_existing",
+                                            "background",
+                                            ))
+
+        if self.background and "levelinf.dat" in self.filepath and not self.placeholders_only and self.in_background(context):
+            session = ImportSession()
+            level_dir = os.path.dirname(os.path.abspath(self.filepath))
+            steps = import_td5dat.level_steps(self.filepath,
+                                              session,
+                                              self.weld_tolerance,
+                                              self.workers,
+                                              self.merge_mode,
+                                              self.models_per_object,
+                                              model_cache.user_cache(context),
+                                              self.atlas_textures)
+            return self.start_steps(context, keywords, steps, lambda: import_td5dat.link_level_textures(level_dir, session))
+
+        with profiling.operator_run(context, self.bl_idname, keywords):
+            return import_td5dat.load(self, context, **keywords)
+
+
+class ImportTD6Level(bpy.types.Operator, background_import.TimeSlicedImport, ImportHelper):
+    """Import an entire level from Test Drive 6"""
+    bl_idname = "import_scene.td6level"
+    bl_label = 'Import Test Drive 6 Level'
+    bl_options = {'UNDO'}
+    
+    filename_ext = "*"
+    filter_glob: StringProperty(default="*", options={'HIDDEN'})
+    
+    merge_models: BoolProperty(
+        name="Merge Models",
+        description="Combine level models into a few large objects instead of one object per model",
+        default=False,
+        )
+        
+    models_per_object: IntProperty(
+        name="Models Per Object",
+        description="Number of models merged into each object",
+        default=64,
+        min=1,
+        )
+        
+    placeholders_only: BoolProperty(
+        name="Placeholders Only",
+        description="Import one sphere empty per model. Full models are loaded later with Object > Load Level Models",
+        default=False,
+        )
+        
+    background: BoolProperty(
+        name="Import in Background",
+        description="Import the level a few models at a time so Blender stays usable. Press Esc to stop, the models imported so far are kept. Imports run from scripts always finish before returning",
+        default=True,
+        )
+    
+    def execute(self, context):
+        from . import import_td6level, model_cache
+        from .session import ImportSession
+        keywords = self.as_keywords(ignore=("axis_forward",
+                                            "axis_up",
+                                            "filter_glob",
+                                            "check_existing",
+                                            "background",
+                                            ))
+
+        if self.background and not self.placeholders_only and self.in_background(context):
+            session = ImportSession()
+            level_dir = import_td6level.level_directory(self.filepath)
+            steps = import_td6level.level_steps(level_dir,
+                                                session,
+                                                self.merge_models,
+                                                self.models_per_object,
+                                                model_cache.user_cache(context))
+            return self.start_steps(context, keywords, steps, lambda: import_td6level.link_level_textures(level_dir, session))
+
+        with profiling.operator_run(context, self.bl_idname, keywords):
+            return import_td6level.load(self, context, **keywords)
+        
+class ImportTD6DAT(bpy.types.Operator, ImportHelper):
+    """Import from Test Drive 6 file format (.dat)"""
+    bl_idname = "import_mesh.td6dat"
+    bl_label = 'Import Test Drive 6 DAT'
+    bl_options = {'UNDO'}
+
+    filename_ext = ".dat"
+    filter_glob: StringProperty(default="*.dat;*.prr", options={'HIDDEN'})
+
+    is_track: BoolProperty(
+        name="Level Model Type",
+        description="Is this model part of a level? If a model comes in looking really weird, try this option.",
+        default=False,
+        )
+        
+    weld_tolerance: FloatProperty(
+        name="Weld Tolerance",
+        description="Vertices closer than this are merged when welding. 0 only merges exact duplicates",
+        default=0.0,
+        min=0.0,
+        precision=4,
+        )
+        
+    def execute(self, context):
+        from . import import_td6dat
+        keywords = self.as_keywords(ignore=("axis_forward",
+                                            "axis_up",
+                                            "filter_glob",
+                                            "check_existing",
+                                            ))
+
+        with profiling.operator_run(context, self.bl_idname, keywords):
+            return import_td6dat.load(self, context, **keywords)
+        
+class ImportTDO3(bpy.types.Operator, ImportHelper):
+    """Import from Test Drive Off-Road 3 file format (.dmp/.mp)"""
+    bl_idname = "import_mesh.tdo3"
+    bl_label = 'Import Test Drive Off-Road 3 DMP/MP'
+    bl_options = {'UNDO'}
+
+    filename_ext = ".dmp"
+    filter_glob: StringProperty(default="*.dmp;*.mp", options={'HIDDEN'})
+
+    def execute(self, context):
+        from . import import_tdo3dat
+        keywords = self.as_keywords(ignore=("axis_forward",
+                                            "axis_up",
+                                            "filter_glob",
+                                            "check_existing",
+                                            ))
+
+        with profiling.operator_run(context, self.bl_idname, keywords):
+            return import_tdo3dat.load(self, context, **keywords)
+        
+class ExportTD5DAT(bpy.types.Operator, ExportHelper):
+    """Export to Test Drive 5 file format (.dat)"""
+    bl_idname = "export_mesh.td5dat"
+    bl_label = 'Export Test Drive 5 DAT'
+
+    filename_ext = ".dat"
+    filter_glob: StringProperty(
+            default="*.dat",
+            options={'HIDDEN'},
+            )
+
+    apply_modifiers: BoolProperty(
+        name="Apply Modifiers",
+        description="Do you desire modifiers to be applied in the exported file?",
+        default=True,
+        )
+        
+    keep_quads: BoolProperty(
+        name="Keep Quads",
+        description="Write flat, convex quads as quads instead of two triangles, which takes fewer vertex records",
+        default=False,
+        )
+        
+    def execute(self, context):
+        from . import export_td5dat
+        
+        keywords = self.as_keywords(ignore=("axis_forward",
+                                            "axis_up",
+                                            "filter_glob",
+                                            "check_existing",
+                                            ))
+                                    
+        with profiling.operator_run(context, self.bl_idname, keywords):
+            return export_td5dat.save(self, context, **keywords)
+
+class ExportTD6DAT(bpy.types.Operator, ExportHelper):
+    """Export to Test Drive 6 file format (.dat)"""
+    bl_idname = "export_mesh.td6dat"
+    bl_label = 'Export Test Drive 6 DAT'
+
+    filename_ext = ".dat"
+    filter_glob: StringProperty(
+            default="*.dat",
+            options={'HIDDEN'},
+            )
+
+    apply_modifiers: BoolProperty(
+        name="Apply Modifiers",
+        description="Do you desire modifiers to be applied in the exported file?",
+        default=True,
+        )
+        
+    is_track: BoolProperty(
+        name="Level Model Type",
+        description="Write a level model, which stores vertex colors instead of normals",
+        default=False,
+        )
+        
+    def execute(self, context):
+        from . import export_td6dat
+        
+        keywords = self.as_keywords(ignore=("axis_forward",
+                                            "axis_up",
+                                            "filter_glob",
+                                            "check_existing",
+                                            ))
+                                    
+        with profiling.operator_run(context, self.bl_idname, keywords):
+            return export_td6dat.save(self, context, **keywords)
+
+class LoadLevelModels(bpy.types.Operator):
+    """Replace level placeholders with their full models"""
+    bl_idname = "td5.load_level_models"
+    bl_label = 'Load Level Models'
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    mode: EnumProperty(
+        name="Load",
+        description="Which placeholders to load",
+        items=(('SELECTED', "Selected", "Selected placeholders"),
+               ('CURSOR', "Near 3D Cursor", "Placeholders within Radius of the 3D cursor"),
+               ('CAMERA', "Near Camera", "Placeholders within Radius of the scene camera")),
+        default='SELECTED',
+        )
+        
+    radius: FloatProperty(
+        name="Radius",
+        description="Distance from the cursor or camera to load models within",
+        default=100.0,
+        min=0.0,
+        subtype='DISTANCE',
+        )
+        
+    def execute(self, context):
+        from . import level_streaming
+        
+        if self.mode == 'SELECTED':
+            placeholders = level_streaming.placeholder_objects(context.selected_objects)
+        else:
+            if self.mode == 'CURSOR':
+                point = context.scene.cursor.location
+            elif context.scene.camera is not None:
+                point = context.scene.camera.matrix_world.translation
+            else:
+                self.report({'ERROR'}, "The scene has no camera")
+                return {'CANCELLED'}
+            placeholders = level_streaming.placeholders_near(context.scene.objects, point, self.radius)
+        
+        with profiling.operator_run(context, self.bl_idname, {"mode": self.mode, "radius": self.radius}):
+            created = level_streaming.load_placeholders(context, placeholders)
+        self.report({'INFO'}, "Loaded %d models" % len(created))
+        return {'FINISHED'}
+
+class ClearModelCache(bpy.types.Operator):
+    """Delete every decoded model stored in the model cache"""
+    bl_idname = "td5.clear_model_cache"
+    bl_label = 'Clear Model Cache'
+    
+    def execute(self, context):
+        from . import model_cache
+        
+        cache = model_cache.GeometryCache(model_cache.cache_directory(), 0)
+        removed = cache.clear()
+        
+        self.report({'INFO'}, "Removed %d cached models" % removed)
+        return {'FINISHED'}
+
+# Preferences
+class TD5AddonPreferences(bpy.types.AddonPreferences):
+    bl_idname = __package__
+    
+    use_cache: BoolProperty(
+        name="Cache Decoded Models",
+        description="Keep decoded level models on disk so importing the same level again skips decoding",
+        default=True,
+        )
+        
+    cache_size: IntProperty(
+        name="Cache Size (MB)",
+        description="Least recently used models are removed once the cache grows past this size",
+        default=512,
+        min=1,
+        )
+        
+    verbosity: EnumProperty(
+        name="Console Output",
+        description="How much imports and exports print to the system console",
+        items=(('QUIET', "Quiet", "Only warnings and errors"),
+               ('NORMAL', "Normal", "Progress and timings of each import or export"),
+               ('DEBUG', "Debug", "Everything, including per model messages and phase timings")),
+        default='NORMAL',
+        update=lambda self, context: profiling.configure_logging(self.verbosity),
+        )
+        
+    profile_memory: BoolProperty(
+        name="Track Memory",
+        description="Record the peak memory of each import and export phase. Makes imports noticeably slower",
+        default=False,
+        )
+        
+    profile_cprofile: BoolProperty(
+        name="Write cProfile Files",
+        description="Run imports and exports under cProfile and write a .prof file to the add-on's config directory",
+        default=False,
+        )
+        
+    profile_log: BoolProperty(
+        name="Write Profile Log",
+        description="Append the phase timings of every import and export to profile_log.jsonl in the add-on's config directory",
+        default=False,
+        )
+        
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "use_cache")
+        
+        row = layout.row()
+        row.enabled = self.use_cache
+        row.prop(self, "cache_size")
+        layout.operator(ClearModelCache.bl_idname)
+        
+        layout.prop(self, "verbosity")
+        layout.prop(self, "profile_memory")
+        layout.prop(self, "profile_cprofile")
+        layout.prop(self, "profile_log")
+
+# Add to a menu
+def menu_func_export_dat(self, context):
+    self.layout.operator(ExportTD5DAT.bl_idname, text="Test Drive 5 (.dat)")
+    
+def menu_func_export_dat6(self, context):
+    self.layout.operator(ExportTD6DAT.bl_idname, text="Test Drive 6 (.dat)")
+    
+def menu_func_import_dat5(self, context):
+    self.layout.operator(ImportTD5DAT.bl_idname, text="Test Drive 5 (.dat)")
+    
+def menu_func_import_dat6(self, context):
+    self.layout.operator(ImportTD6DAT.bl_idname, text="Test Drive 6 (.dat)")
+    
+def menu_func_import_dat_o3(self, context):
+    self.layout.operator(ImportTDO3.bl_idname, text="Test Drive Off-Road 3 (.dmp/.mp)")
+    
+def menu_func_import_level6(self, context):
+    self.layout.operator(ImportTD6Level.bl_idname, text="Test Drive 6 Level")
+    
+def menu_func_object_load_models(self, context):
+    self.layout.operator(LoadLevelModels.bl_idname)
+
+
+# Register factories
+def register():
+    bpy.utils.register_class(TD5AddonPreferences)
+    bpy.utils.register_class(ClearModelCache)
+    bpy.utils.register_class(LoadLevelModels)
+    bpy.utils.register_class(ImportTD6DAT)
+    bpy.utils.register_class(ImportTD6Level)
+    bpy.utils.register_class(ImportTD5DAT)
+    #bpy.utils.register_class(ImportTD5Level)
+    bpy.utils.register_class(ExportTD5DAT)
+    bpy.utils.register_class(ExportTD6DAT)
+    bpy.utils.register_class(ImportTDO3)
+    bpy.types.TOPBAR_MT_file_import.append(menu_func_import_dat6)
+    bpy.types.TOPBAR_MT_file_import.append(menu_func_import_dat5)
+    bpy.types.TOPBAR_MT_file_import.append(menu_func_import_level6)
+    bpy.types.TOPBAR_MT_file_import.append(menu_func_import_dat_o3)
+    #bpy.types.TOPBAR_MT_file_import.append(menu_func_import_level5)
+    bpy.types.TOPBAR_MT_file_export.append(menu_func_export_dat)
+    bpy.types.TOPBAR_MT_file_export.append(menu_func_export_dat6)
+    bpy.types.VIEW3D_MT_object.append(menu_func_object_load_models)
+    background_import.register_handlers()
+
+
+def unregister():
+    background_import.unregister_handlers()
+    bpy.types.VIEW3D_MT_object.remove(menu_func_object_load_models)
+    bpy.types.TOPBAR_MT_file_export.remove(menu_func_export_dat6)
+    bpy.types.TOPBAR_MT_file_export.remove(menu_func_export_dat)
+    bpy.types.TOPBAR_MT_file_import.remove(menu_func_import_dat_o3)
+    bpy.types.TOPBAR_MT_file_import.remove(menu_func_import_level6)
+    #bpy.types.TOPBAR_MT_file_import.remove(menu_func_import_level5)
+    bpy.types.TOPBAR_MT_file_import.remove(menu_func_import_dat6)
+    bpy.types.TOPBAR_MT_file_import.remove(menu_func_import_dat5)
+    bpy.utils.unregister_class(ImportTDO3)
+    bpy.utils.unregister_class(ExportTD6DAT)
+    bpy.utils.unregister_class(ExportTD5DAT)
+    #bpy.utils.unregister_class(ImportTD5Level)
+    bpy.utils.unregister_class(ImportTD5DAT)
+    bpy.utils.unregister_class(ImportTD6Level)
+    bpy.utils.unregister_class(ImportTD6DAT)
+    bpy.utils.unregister_class(LoadLevelModels)
+    bpy.utils.unregister_class(ClearModelCache)
+    bpy.utils.unregister_class(TD5AddonPreferences)
+
@@ -0,0 +1,206 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Named phase timers for imports and exports. Code marks its phases with
+#
+#   with profiling.phase("decode"):
+#       ...
+#
+# which costs nothing unless an operator run is being profiled. Phase times
+# are exclusive, time spent in a nested phase only counts towards the
+# nested one. Runs can also track peak memory per phase with tracemalloc,
+# dump a cProfile file, and append a line to a JSON log
+
+import contextlib, cProfile, datetime, json, logging, os, sys, time, tracemalloc
+
+# logging levels of the verbosity preference
+VERBOSITY_LEVELS = {
+    'QUIET': logging.WARNING,
+    'NORMAL': logging.INFO,
+    'DEBUG': logging.DEBUG,
+}
+
+PROFILE_LOG_NAME = "profile_log.jsonl"
+
+# profiler of the operator run in progress
+active = None
+
+######################################################
+# LOGGING
+######################################################
+def configure_logging(verbosity='NORMAL'):
+    # every module logs through a child of the package logger, which prints
+    # plain messages like the add-on always has
+    logger = logging.getLogger(__package__)
+    if not any(getattr(handler, "td5_handler", False) for handler in logger.handlers):
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler.td5_handler = True
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(VERBOSITY_LEVELS.get(verbosity, logging.INFO))
+
+
+configure_logging()
+
+######################################################
+# PROFILER
+######################################################
+class Profiler:
+    """Exclusive time and peak traced memory of named phases"""
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.phases = {}
+        self.stack = []
+
+    def traced_peak(self):
+        return tracemalloc.get_traced_memory()[1]
+
+    def reset_peak(self):
+        # reset_peak is Python 3.9+, older versions keep the peak of the run
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        entry = {"name": name, "child_seconds": 0.0, "peak_bytes": 0}
+        if self.track_memory:
+            if self.stack:
+                self.stack[-1]["peak_bytes"] = max(self.stack[-1]["peak_bytes"], self.traced_peak())
+            self.reset_peak()
+
+        self.stack.append(entry)
+        time1 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - time1
+            self.stack.pop()
+
+            result = self.phases.setdefault(name, {"seconds": 0.0, "calls": 0})
+            result["seconds"] += elapsed - entry["child_seconds"]
+            result["calls"] += 1
+
+            if self.track_memory:
+                peak = max(entry["peak_bytes"], self.traced_peak())
+                result["peak_bytes"] = max(result.get("peak_bytes", 0), peak)
+                if self.stack:
+                    self.stack[-1]["peak_bytes"] = max(self.stack[-1]["peak_bytes"], peak)
+                self.reset_peak()
+
+            if self.stack:
+                self.stack[-1]["child_seconds"] += elapsed
+
+
+@contextlib.contextmanager
+def phase(name):
+    if active is None:
+        yield
+    else:
+        with active.phase(name):
+            yield
+
+######################################################
+# OPERATOR RUNS
+######################################################
+def log_directory():
+    import bpy
+    return bpy.utils.user_resource('CONFIG', path=__package__, create=True)
+
+
+def addon_preferences(context):
+    addon = context.preferences.addons.get(__package__)
+    return addon.preferences if addon is not None else None
+
+
+def json_settings(settings):
+    # operator keywords that survive a round trip through JSON
+    return {key: value for key, value in settings.items() if isinstance(value, (str, int, float, bool, type(None)))}
+
+
+class OperatorRun:
+    """Profile of one import or export, configured by the add-on preferences"""
+
+    def __init__(self, context, name, settings=None):
+        prefs = addon_preferences(context)
+        configure_logging(prefs.verbosity if prefs is not None else 'NORMAL')
+
+        self.name = name
+        self.settings = json_settings(settings or {})
+        self.write_log = prefs is not None and prefs.profile_log
+        self.profiler = Profiler(prefs is not None and prefs.profile_memory)
+        self.profile = cProfile.Profile() if prefs is not None and prefs.profile_cprofile else None
+
+        self.started_tracing = self.profiler.track_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        self.started = datetime.datetime.now()
+        self.seconds = 0.0
+
+    @contextlib.contextmanager
+    def slice(self):
+        # profiles the code run inside, a time sliced import has one slice
+        # per timer event and only the slices count towards its time
+        global active
+        previous, active = active, self.profiler
+        time1 = time.perf_counter()
+        if self.profile is not None:
+            self.profile.enable()
+        try:
+            with self.profiler.phase("other"):
+                yield self.profiler
+        finally:
+            if self.profile is not None:
+                self.profile.disable()
+            self.seconds += time.perf_counter() - time1
+            active = previous
+
+    def finish(self, error=None):
+        if self.started_tracing:
+            tracemalloc.stop()
+
+        stamp = self.started.strftime("%Y%m%d_%H%M%S")
+        entry = {
+            "operator": self.name,
+            "started": self.started.isoformat(timespec='seconds'),
+            "seconds": self.seconds,
+            "settings": self.settings,
+            "phases": self.profiler.phases,
+            "error": error,
+        }
+
+        if self.profile is not None:
+            profile_path = os.path.join(log_directory(), "%s_%s.prof" % (self.name.replace(".", "_"), stamp))
+            self.profile.dump_stats(profile_path)
+            entry["cprofile"] = profile_path
+
+        if self.write_log:
+            with open(os.path.join(log_directory(), PROFILE_LOG_NAME), 'a') as file:
+                file.write(json.dumps(entry) + "\n")
+
+        logger = logging.getLogger(__package__)
+        for phase_name, result in self.profiler.phases.items():
+            memory = " (peak %.1f MB)" % (result["peak_bytes"] / (1024 * 1024)) if "peak_bytes" in result else ""
+            logger.debug(" %s: %.4f sec.%s" % (phase_name, result["seconds"], memory))
+
+
+@contextlib.contextmanager
+def operator_run(context, name, settings=None):
+    # profiles one import or export that runs start to finish
+    run = OperatorRun(context, name, settings)
+    error = None
+    try:
+        with run.slice() as profiler:
+            yield profiler
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        run.finish(error)
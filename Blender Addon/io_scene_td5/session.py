@@ -0,0 +1,38 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import bpy
+import os
+
+######################################################
+# IMPORT SESSION
+######################################################
+class ImportSession:
+    """What one import created, so textures are only attached to new materials and images are loaded once"""
+
+    def __init__(self):
+        # texture number -> material created by this import
+        self.materials = {}
+        # path or other key -> image
+        self.images = {}
+
+    def add_material(self, texnum, mtl):
+        self.materials[texnum] = mtl
+
+    def image(self, key, create):
+        img = self.images.get(key)
+        if img is None:
+            img = create()
+            self.images[key] = img
+        return img
+
+    def load_image(self, filepath):
+        # images already loaded by an earlier import are reused too
+        key = os.path.normcase(os.path.abspath(filepath))
+        return self.image(key, lambda: bpy.data.images.load(filepath, check_existing=True))
@@ -0,0 +1,115 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Splits a triangulated mesh into TD6 submeshes: loops are welded per
+# material, triangles are ordered for the vertex cache, and submeshes are
+# cut wherever they would use more vertices than 16 bit indices can reach.
+# Works on plain arrays, the exporter reads them out of a Blender mesh
+
+import numpy as np
+
+from . import profiling, vertex_cache
+from .formats import td6
+
+# index buffers are uint16
+MAX_SUBMESH_VERTICES = 0xFFFF
+
+######################################################
+# SUBMESHES
+######################################################
+def split_triangles(triangles, limit=MAX_SUBMESH_VERTICES):
+    # splits (N, 3) triangles into consecutive (start, end) ranges that each
+    # use at most limit vertices. one walk over the triangles, a range is
+    # cut before the triangle that would take it past the limit
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(triangles) == 0:
+        return []
+
+    # start of the range that last used each vertex
+    last_range = [-1] * (int(triangles.max()) + 1)
+    ranges = []
+    start = 0
+    used = 0
+    for t, corners in enumerate(triangles.tolist()):
+        new = {v for v in corners if last_range[v] != start}
+        if used + len(new) > limit and t > start:
+            ranges.append((start, t))
+            start = t
+            used = 0
+            new = set(corners)
+        for v in new:
+            last_range[v] = start
+        used += len(new)
+
+    ranges.append((start, len(triangles)))
+    return ranges
+
+
+def build_submeshes(triangle_loops,
+                    triangle_materials,
+                    texture_numbers,
+                    loop_verts,
+                    positions,
+                    loop_uvs,
+                    normals=None,
+                    loop_colors=None,
+                    cache_size=vertex_cache.CACHE_SIZE,
+                    max_vertices=MAX_SUBMESH_VERTICES):
+    # triangle_loops are (N, 3) mesh loops and triangle_materials the slot of
+    # each triangle, texture_numbers has one entry per slot. positions and
+    # normals are per mesh vertex in game space, loop_uvs are Blender UVs and
+    # loop_colors uint8 RGBA. level models pass loop_colors instead of
+    # normals. returns [(texture number, vertex records, (N, 3) indices)] and
+    # the triangle weighted ACMR before and after reordering
+    is_track = loop_colors is not None
+    triangle_loops = np.asarray(triangle_loops).reshape(-1, 3)
+    loop_uvs = np.ascontiguousarray(loop_uvs, dtype=np.float32)
+
+    # loops with the same vertex and attributes weld, floats are compared
+    # by their bits
+    keys = np.column_stack((loop_verts, loop_uvs.view(np.int32)))
+    if is_track:
+        keys = np.column_stack((keys, np.ascontiguousarray(loop_colors, dtype=np.uint8).view(np.int32)))
+
+    submeshes = []
+    misses_before = 0.0
+    misses_after = 0.0
+    for material, texture_number in enumerate(texture_numbers):
+        corners = triangle_loops[triangle_materials == material]
+        if len(corners) == 0:
+            continue
+
+        # weld, then order triangles for the vertex cache
+        _, first_loop, inverse = np.unique(keys[corners.ravel()], axis=0, return_index=True, return_inverse=True)
+        triangles = inverse.reshape(-1, 3)
+        corner_loops = corners.ravel()[first_loop]
+
+        with profiling.phase("vertex cache"):
+            misses_before += vertex_cache.acmr(triangles, cache_size) * len(triangles)
+            triangles = triangles[vertex_cache.tipsify(triangles, len(first_loop), cache_size)]
+            misses_after += vertex_cache.acmr(triangles, cache_size) * len(triangles)
+
+        for start, end in split_triangles(triangles, max_vertices):
+            indices, used = vertex_cache.first_use_order(triangles[start:end], len(first_loop))
+            loops = corner_loops[used]
+            verts = loop_verts[loops]
+
+            records = np.zeros(len(loops), dtype=td6.TRACK_VERTEX_DTYPE if is_track else td6.VERTEX_DTYPE)
+            records['position'] = positions[verts]
+            records['uv'][:, 0] = loop_uvs[loops, 0]
+            records['uv'][:, 1] = 1 - loop_uvs[loops, 1].astype(np.float64)
+            if is_track:
+                records['color'] = loop_colors[loops]
+            else:
+                records['normal'] = normals[verts]
+
+            submeshes.append((texture_number, records, indices))
+
+    triangle_count = max(len(triangle_loops), 1)
+    return submeshes, misses_before / triangle_count, misses_after / triangle_count
@@ -0,0 +1,27 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import bpy
+import numpy as np
+
+######################################################
+# IMAGES
+######################################################
+def image_from_rgba(name, rgba):
+    # (height, width, 4) RGBA bytes, top row first, to a packed Blender image
+    height, width = rgba.shape[:2]
+    img = bpy.data.images.new(name, width, height, alpha=True)
+
+    # Blender stores pixels as floats, bottom row first
+    pixels = rgba[::-1].astype(np.float32) / 255
+    img.pixels.foreach_set(pixels.ravel())
+
+    # generated images are lost on save unless packed
+    img.pack()
+    return img
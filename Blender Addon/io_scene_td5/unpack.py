@@ -0,0 +1,101 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Unpacks models.dat / textures.dat the same way td5unpack does, without
+# needing bpy:
+#
+#   python -m io_scene_td5.unpack path/to/textures.dat [output directory]
+
+import concurrent.futures
+import os, struct, sys, time, zlib
+
+import numpy as np
+
+from .formats import archive
+
+######################################################
+# PNG
+######################################################
+def png_chunk(chunk_type, data):
+    chunk = chunk_type + data
+    return struct.pack('>L', len(data)) + chunk + struct.pack('>L', zlib.crc32(chunk) & 0xFFFFFFFF)
+
+
+def encode_png(rgba):
+    # (height, width, 4) bytes to an 8 bit RGBA png, top row first
+    height, width = rgba.shape[:2]
+
+    # every row starts with filter type 0
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = rgba.reshape(height, width * 4)
+
+    return (b'\x89PNG\r\n\x1a\n' +
+            png_chunk(b'IHDR', struct.pack('>LLBBBBB', width, height, 8, 6, 0, 0, 0)) +
+            png_chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)) +
+            png_chunk(b'IEND', b''))
+
+
+def write_png(filepath, rgba):
+    with open(filepath, 'wb') as file:
+        file.write(encode_png(rgba))
+
+######################################################
+# UNPACKING
+######################################################
+def unpack_textures(filepath, out_dir, workers=None):
+    # writes texture_N.png for every texture, zlib releases the GIL so
+    # threads are enough to spread the encoding out
+    os.makedirs(out_dir, exist_ok=True)
+    with archive.TexturesArchive(filepath) as textures:
+        images = textures.decode_all()
+
+    paths = [os.path.join(out_dir, "texture_%d.png" % i) for i in range(len(images))]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(write_png, paths, images))
+    return paths
+
+
+def unpack_models(filepath, out_dir):
+    # writes every model as a loose file named after its offset
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    with archive.ModelsArchive(filepath) as models:
+        for i in range(len(models)):
+            path = os.path.join(out_dir, "%04X.dat" % int(models.model_offsets[i]))
+            with open(path, 'wb') as file:
+                file.write(models.model(i))
+            paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 0:
+        print("usage: python -m io_scene_td5.unpack <models.dat|textures.dat> [output directory]")
+        return 1
+
+    filepath = argv[0]
+    filename = os.path.splitext(os.path.basename(filepath))[0].lower()
+    out_dir = argv[1] if len(argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(filepath)), filename)
+
+    time1 = time.perf_counter()
+    if filename == "textures":
+        paths = unpack_textures(filepath, out_dir)
+    elif filename == "models":
+        paths = unpack_models(filepath, out_dir)
+    else:
+        print("I don't know how to unpack %s" % filename)
+        return 1
+
+    print("Unpacked %d files to %s in %.4f sec." % (len(paths), out_dir, time.perf_counter() - time1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
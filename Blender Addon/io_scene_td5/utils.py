@@ -0,0 +1,85 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Helpers shared by the model cache, the level index and the headless
+# scripts (batch.py, convert.py). Nothing in here touches bpy
+
+import argparse, contextlib, json, os, shutil, subprocess, tempfile
+
+######################################################
+# FILES
+######################################################
+@contextlib.contextmanager
+def atomic_path(filepath):
+    # yields a path next to filepath to write to, which is swapped in once the
+    # block finishes. a crash or an interrupted run never leaves a half
+    # written file under the final name. the extension is kept, some
+    # exporters add theirs otherwise
+    base, extension = os.path.splitext(filepath)
+    temp_path = base + ".tmp" + extension
+    try:
+        yield temp_path
+        os.replace(temp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+######################################################
+# SCRIPTS
+######################################################
+def script_parser(prog, description, output_help):
+    # arguments every headless script takes
+    parser = argparse.ArgumentParser(prog=prog, description=description)
+    parser.add_argument("--output", required=True, help=output_help)
+    parser.add_argument("--jobs", type=int, default=1, help="number of Blender processes to run")
+    parser.add_argument("--summary", default=None, help="path of the JSON summary")
+    return parser
+
+
+def parse_script_args(parser, argv):
+    # Blender's own arguments come before "--"
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    return parser.parse_args(argv)
+
+
+def write_summary(filepath, summary):
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+    with open(filepath, 'w') as file:
+        json.dump(summary, file, indent=2)
+
+
+def run_jobs(blender_path, script, jobs, job_args, summary_key, failed_entries):
+    # runs script in one background Blender process per job, all at once.
+    # job_args(index, job, temp_dir) gives the script arguments of a job,
+    # each process writes its results under summary_key of the summary it's
+    # given. jobs whose process died get failed_entries(job, message)
+    temp_dir = tempfile.mkdtemp(prefix="td5_jobs_")
+    try:
+        processes = []
+        for i, job in enumerate(jobs):
+            summary_path = os.path.join(temp_dir, "job_%03d.json" % i)
+            command = [blender_path, "--background", "--factory-startup",
+                       "--python", os.path.abspath(script), "--",
+                       *job_args(i, job, temp_dir), "--summary", summary_path]
+            processes.append((subprocess.Popen(command), summary_path, job))
+
+        results = []
+        for process, summary_path, job in processes:
+            process.wait()
+            if os.path.isfile(summary_path):
+                with open(summary_path) as file:
+                    results += json.load(file)[summary_key]
+            else:
+                results += failed_entries(job, "Blender exited with code %d" % process.returncode)
+        return results
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
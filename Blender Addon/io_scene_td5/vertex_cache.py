@@ -0,0 +1,122 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Triangle ordering for the post-transform vertex cache, using Tipsify
+# (Sander, Nehab, Barczak 2007, "Fast Triangle Reordering for Vertex Locality
+# and Reduced Overdraw"). Caches are modelled as FIFO, a vertex stays cached
+# until cache_size misses later
+
+import numpy as np
+
+# typical post-transform cache size of the hardware the games ran on
+CACHE_SIZE = 16
+
+######################################################
+# MEASURING
+######################################################
+def acmr(triangles, cache_size=CACHE_SIZE):
+    # average cache miss ratio, transformed vertices per triangle. 3 is no
+    # reuse at all, 0.5 is about the best a regular grid can do
+    if len(triangles) == 0:
+        return 0.0
+    stamps = {}
+    misses = 0
+    for v in np.asarray(triangles).ravel().tolist():
+        if misses - stamps.get(v, -cache_size) >= cache_size:
+            stamps[v] = misses
+            misses += 1
+    return misses / len(triangles)
+
+######################################################
+# ORDERING
+######################################################
+def vertex_triangles(triangles, vertex_count):
+    # (starts, triangle ids) listing the triangles using each vertex
+    corners = np.asarray(triangles, dtype=np.int64).ravel()
+    order = np.argsort(corners, kind='stable')
+    starts = np.zeros(vertex_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(corners, minlength=vertex_count), out=starts[1:])
+    return starts.tolist(), (order // 3).tolist()
+
+
+def tipsify(triangles, vertex_count, cache_size=CACHE_SIZE):
+    # returns the new order of triangles, (N, 3) vertex indices. fans
+    # around one vertex at a time and picks the next fanning vertex among
+    # those that will still be in the cache once its remaining triangles
+    # are emitted
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(triangles) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    starts, adjacency = vertex_triangles(triangles, vertex_count)
+    corners = triangles.tolist()
+    live = np.bincount(triangles.ravel(), minlength=vertex_count).tolist()
+    stamps = [0] * vertex_count
+    emitted = [False] * len(corners)
+
+    order = []
+    dead_end = []
+    time = cache_size + 1
+    cursor = 0
+    fan = int(triangles[0, 0])
+
+    while fan >= 0:
+        candidates = []
+        for t in adjacency[starts[fan]:starts[fan + 1]]:
+            if emitted[t]:
+                continue
+            for v in corners[t]:
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if time - stamps[v] > cache_size:
+                    stamps[v] = time
+                    time += 1
+            emitted[t] = True
+            order.append(t)
+
+        # best candidate that is still cached after its fan
+        fan = -1
+        best = -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = 0
+                if time - stamps[v] + 2 * live[v] <= cache_size:
+                    priority = time - stamps[v]
+                if priority > best:
+                    best = priority
+                    fan = v
+
+        # otherwise the most recent vertex with triangles left, then any
+        if fan < 0:
+            while dead_end:
+                v = dead_end.pop()
+                if live[v] > 0:
+                    fan = v
+                    break
+        if fan < 0:
+            while cursor < vertex_count:
+                if live[cursor] > 0:
+                    fan = cursor
+                    break
+                cursor += 1
+
+    return np.array(order, dtype=np.int64)
+
+
+def first_use_order(triangles, vertex_count):
+    # renumbers vertices in the order triangles first use them, returns
+    # (remapped triangles, old index of each new vertex). unused vertices
+    # are dropped
+    corners = np.asarray(triangles, dtype=np.int64).ravel()
+    used, first = np.unique(corners, return_index=True)
+    old_indices = used[np.argsort(first, kind='stable')]
+    remap = np.full(vertex_count, -1, dtype=np.int64)
+    remap[old_indices] = np.arange(len(old_indices))
+    return remap[corners].reshape(-1, 3), old_indices
@@ -0,0 +1,45 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import numpy as np
+
+######################################################
+# WELDING
+######################################################
+def weld_keys(positions, normals=None, tolerance=0.0):
+    keys = positions if normals is None else np.hstack((positions, normals))
+    if tolerance > 0.0:
+        # snap to a grid of tolerance sized cells
+        keys = np.floor(np.asarray(keys, dtype=np.float64) / tolerance + 0.5).astype(np.int64)
+    keys = np.ascontiguousarray(keys)
+
+    # view each row as one opaque value so unique compares raw bytes
+    return keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+
+
+def weld_vertices(positions, normals=None, tolerance=0.0):
+    # merges vertices sharing a position and normal
+    # returns (unique, remap, merged_count) where unique holds the index of the
+    # first vertex of each welded vertex in first seen order, and remap holds
+    # the welded vertex index for every input vertex
+    vertex_count = len(positions)
+    if vertex_count == 0:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), 0
+
+    keys = weld_keys(positions, normals, tolerance)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # unique sorts its output, put welded vertices back in first seen order
+    order = np.argsort(first, kind='stable')
+    rank = np.empty(len(order), dtype=np.int32)
+    rank[order] = np.arange(len(order), dtype=np.int32)
+
+    unique = first[order].astype(np.int32)
+    remap = rank[inverse.ravel()]
+    return unique, remap, vertex_count - len(unique)
@@ -0,0 +1,228 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Times the import pipeline on synthetic files, stage by stage:
+#
+#   python benchmarks/bench_import.py --output before.json
+#   python benchmarks/bench_import.py --output after.json --compare before.json
+#
+# parse is reading the file into format arrays, weld is turning those into
+# MeshGeometry (welding included) and build is writing the geometry into a
+# Blender mesh. build only runs when bpy can be imported, for that run it
+# through Blender:
+#
+#   blender --background --factory-startup --python benchmarks/bench_import.py -- --output blender.json
+#
+# Every stage is run --repeat times and the best time is reported, along
+# with the median, MB/s of source data and vertex records per second
+
+import argparse, json, os, platform, statistics, subprocess, sys, tempfile, time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_DIR), "Blender Addon"))
+
+import numpy as np
+
+import fixtures
+from io_scene_td5 import geometry
+from io_scene_td5.formats import archive, td5, td6, tdo3
+
+try:
+    import bpy
+    from io_scene_td5 import mesh_builder
+except ImportError:
+    bpy = None
+
+# bump when cases change, results from different versions aren't comparable
+BENCHMARK_VERSION = 1
+
+######################################################
+# CASES
+######################################################
+def td5_models_dat(models_path):
+    with archive.ModelsArchive(models_path) as models:
+        return [td5.read_model(models.model(i)) for i in range(len(models))]
+
+
+def make_cases(scale, temp_dir):
+    # name -> (source bytes, vertex records, parse(), weld(parsed) -> geoms)
+    cases = {}
+
+    data = fixtures.td5_model(submeshes=8, tris=400 * scale, quads=200 * scale)
+    model = td5.read_model(data)
+    cases["td5_model"] = (len(data), len(model.vertices),
+                          lambda data=data: td5.read_model(data),
+                          lambda model: [geometry.from_td5_model(model)])
+
+    data = fixtures.td6_model(submeshes=8, vertices=600 * scale, triangles=800 * scale)
+    cases["td6_model"] = (len(data), 8 * 600 * scale,
+                          lambda data=data: td6.read_model(data),
+                          lambda model: [geometry.from_td6_model(model)])
+
+    data = fixtures.td6_model(submeshes=8, vertices=600 * scale, triangles=800 * scale, is_track=True)
+    cases["td6_track_model"] = (len(data), 8 * 600 * scale,
+                                lambda data=data: td6.read_model(data, is_track=True),
+                                lambda model: [geometry.from_td6_model(model)])
+
+    data = fixtures.tdo3_object(vertices=4000 * scale, faces=6000 * scale)
+    cases["tdo3_dmp"] = (len(data), 4000 * scale,
+                         lambda data=data: tdo3.read_object(data, 0, False)[0],
+                         lambda mesh: [geometry.from_tdo3_mesh(mesh)])
+
+    data = fixtures.tdo3_track(meshes=32, vertices=500 * scale, faces=750 * scale)
+    cases["tdo3_mp"] = (len(data), 32 * 500 * scale,
+                        lambda data=data: tdo3.read_track(data),
+                        lambda meshes: [geometry.from_tdo3_mesh(mesh) for mesh in meshes])
+
+    data = fixtures.strip_dat(strips=5000 * scale, positions=20000 * scale)
+    collision = td5.read_collision(data)
+    row_counts = td5.strip_rows(collision)[1]
+    cases["strip_dat"] = (len(data), int(row_counts.sum()),
+                          lambda data=data: td5.read_collision(data),
+                          lambda collision: [geometry.from_td5_collision(collision)])
+
+    # models.dat is mapped from disk like a real level import
+    models_path = os.path.join(temp_dir, "models.dat")
+    with open(models_path, 'wb') as file:
+        file.write(fixtures.models_dat(groups=16, per_group=4 * scale))
+    vertex_records = sum(len(model.vertices) for model in td5_models_dat(models_path))
+    cases["models_dat"] = (os.path.getsize(models_path), vertex_records,
+                           lambda: td5_models_dat(models_path),
+                           lambda models: [geometry.from_td5_model(model) for model in models])
+
+    return cases
+
+######################################################
+# TIMING
+######################################################
+def time_stage(function, repeat):
+    # returns (best, median, last result)
+    times = []
+    result = None
+    for _ in range(repeat):
+        time1 = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - time1)
+    return min(times), statistics.median(times), result
+
+
+def build_meshes(geoms):
+    meshes = [bpy.data.meshes.new("bench_Mesh") for _ in geoms]
+    for me, geom in zip(meshes, geoms):
+        mesh_builder.build_geometry(me, geom)
+    return meshes
+
+
+def stage_result(best, median, byte_count, vertex_count):
+    return {
+        "best": best,
+        "median": median,
+        "mb_per_s": byte_count / best / (1024 * 1024) if best > 0 else None,
+        "vertices_per_s": vertex_count / best if best > 0 else None,
+    }
+
+
+def run_case(name, case, repeat):
+    byte_count, vertex_count, parse, weld = case
+    stages = {}
+
+    best, median, parsed = time_stage(parse, repeat)
+    stages["parse"] = stage_result(best, median, byte_count, vertex_count)
+
+    best, median, geoms = time_stage(lambda: weld(parsed), repeat)
+    stages["weld"] = stage_result(best, median, byte_count, vertex_count)
+
+    if bpy is not None:
+        times = []
+        for _ in range(repeat):
+            time1 = time.perf_counter()
+            meshes = build_meshes(geoms)
+            times.append(time.perf_counter() - time1)
+            for me in meshes:
+                bpy.data.meshes.remove(me)
+        stages["build"] = stage_result(min(times), statistics.median(times), byte_count, vertex_count)
+
+    print("%-16s %8.2f MB %9d verts  " % (name, byte_count / (1024 * 1024), vertex_count) +
+          "  ".join("%s %.4fs" % (stage, result["best"]) for stage, result in stages.items()))
+    return {"bytes": byte_count, "vertices": vertex_count, "stages": stages}
+
+######################################################
+# REPORTING
+######################################################
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCHMARK_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "blender": bpy.app.version_string if bpy is not None else None,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def compare(results, baseline):
+    # best time of each stage against the baseline, < 1 is faster
+    if baseline.get("version") != BENCHMARK_VERSION or baseline.get("settings") != results["settings"]:
+        print("Baseline was run with a different version or settings, comparing anyway")
+
+    print("\n%-16s %-6s %10s %10s %7s" % ("case", "stage", "baseline", "now", "ratio"))
+    for name, case in results["cases"].items():
+        for stage, result in case["stages"].items():
+            old = baseline.get("cases", {}).get(name, {}).get("stages", {}).get(stage)
+            if old is None or old["best"] <= 0:
+                continue
+            print("%-16s %-6s %9.4fs %9.4fs %6.2fx" % (name, stage, old["best"], result["best"], result["best"] / old["best"]))
+
+
+def parse_args(argv):
+    # when run through Blender, Blender's own arguments come before "--"
+    argv = argv[argv.index("--") + 1:] if "--" in argv else argv[1:]
+
+    parser = argparse.ArgumentParser(description="Benchmark the Test Drive import pipeline on synthetic files")
+    parser.add_argument("--scale", type=int, default=1, help="multiplies the size of every fixture")
+    parser.add_argument("--repeat", type=int, default=5, help="times each stage is run")
+    parser.add_argument("--cases", nargs='+', default=None, help="only run these cases")
+    parser.add_argument("--output", default=None, help="path to write the JSON results to")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv if argv is None else argv)
+
+    results = {
+        "version": BENCHMARK_VERSION,
+        "environment": environment(),
+        "settings": {"scale": args.scale, "repeat": args.repeat},
+        "cases": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="td5_bench_") as temp_dir:
+        cases = make_cases(args.scale, temp_dir)
+        for name, case in cases.items():
+            if args.cases is None or name in args.cases:
+                results["cases"][name] = run_case(name, case, args.repeat)
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+# Deterministic synthetic files in every format the add-on reads. The same
+# arguments always give the same bytes, so timings can be compared between
+# commits. Face corners are drawn from a smaller pool of positions so welding
+# has real work to do
+
+import struct
+
+import numpy as np
+
+from io_scene_td5.formats import td5, td6
+
+# share of vertex records that reuse an existing position
+POOL_RATIO = 0.25
+
+######################################################
+# HELPERS
+######################################################
+def vertex_pool(rng, count):
+    # positions in game units and a matching normal per position
+    positions = rng.integers(-20000, 20000, (count, 3)).astype(np.float32)
+    normals = rng.normal(size=(count, 3)).astype(np.float32)
+    normals /= np.linalg.norm(normals, axis=1)[:, None]
+    return positions, normals
+
+
+def pool_indices(rng, record_count):
+    pool_size = max(1, int(record_count * POOL_RATIO))
+    return rng.integers(0, pool_size, record_count), pool_size
+
+######################################################
+# TD5 / TD6
+######################################################
+def td5_model(submeshes=8, tris=400, quads=200, seed=0):
+    # 64 byte header, submeshes, 44 byte vertex records then 16 byte normals
+    rng = np.random.default_rng(seed)
+    record_count = submeshes * (tris * 3 + quads * 4)
+    picks, pool_size = pool_indices(rng, record_count)
+    positions, normals = vertex_pool(rng, pool_size)
+
+    submesh_offset = 64
+    vertex_offset = submesh_offset + submeshes * td5.SUBMESH_DTYPE.itemsize
+    normal_offset = vertex_offset + record_count * td5.VERTEX_DTYPE.itemsize
+
+    header = bytearray(64)
+    struct.pack_into('<HBBLL', header, 0, td5.MODEL_MAGIC, 0, 0, submeshes, record_count)
+    struct.pack_into('<ffff', header, 12, 20000.0, 0.0, 0.0, 0.0)
+    struct.pack_into('<LLL', header, 44, submesh_offset, vertex_offset, normal_offset)
+
+    submesh_table = np.zeros(submeshes, dtype=td5.SUBMESH_DTYPE)
+    submesh_table['texture_id'] = np.arange(submeshes)
+    submesh_table['tri_count'] = tris
+    submesh_table['quad_count'] = quads
+
+    vertices = np.zeros(record_count, dtype=td5.VERTEX_DTYPE)
+    vertices['position'] = positions[picks]
+    vertices['uv'] = rng.random((record_count, 2), dtype=np.float32)
+    vertices['color'] = rng.integers(0, 256, (record_count, 4))
+
+    vertex_normals = np.zeros(record_count, dtype=td5.NORMAL_DTYPE)
+    vertex_normals['normal'] = normals[picks]
+
+    return bytes(header) + submesh_table.tobytes() + vertices.tobytes() + vertex_normals.tobytes()
+
+
+def td6_model(submeshes=8, vertices=600, triangles=800, is_track=False, seed=0):
+    # 52 byte header, submeshes, then each submesh's vertices and u16 indices
+    rng = np.random.default_rng(seed)
+    vertex_dtype = td6.TRACK_VERTEX_DTYPE if is_track else td6.VERTEX_DTYPE
+    positions, normals = vertex_pool(rng, vertices)
+
+    submesh_offset = 52
+    data_offset = submesh_offset + submeshes * td6.SUBMESH_DTYPE.itemsize
+    submesh_table = np.zeros(submeshes, dtype=td6.SUBMESH_DTYPE)
+
+    blobs = []
+    position = data_offset
+    for s in range(submeshes):
+        records = np.zeros(vertices, dtype=vertex_dtype)
+        records['position'] = positions
+        records['uv'] = rng.random((vertices, 2), dtype=np.float32)
+        if is_track:
+            records['color'] = rng.integers(0, 256, (vertices, 4))
+        else:
+            records['normal'] = normals
+        indices = rng.integers(0, vertices, triangles * 3).astype('<u2')
+
+        submesh_table[s]['texture_number'] = s
+        submesh_table[s]['vert_count'] = vertices
+        submesh_table[s]['index_count'] = len(indices)
+        submesh_table[s]['vert_offset'] = position
+        submesh_table[s]['index_offset'] = position + records.nbytes
+        blobs += [records.tobytes(), indices.tobytes()]
+        position += records.nbytes + indices.nbytes
+
+    header = bytearray(52)
+    struct.pack_into('<HBBLL', header, 0, td6.MODEL_MAGIC, 0, 0, submeshes, submeshes * vertices)
+    struct.pack_into('<fffffff', header, 12, 20000.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    struct.pack_into('<LL', header, 44, submesh_offset, data_offset)
+
+    return bytes(header) + submesh_table.tobytes() + b''.join(blobs)
+
+######################################################
+# OFF-ROAD 3
+######################################################
+def tdo3_object(vertices=2000, faces=3000, materials=8, is_track=False, seed=0):
+    # object type, unknown data, matrix, bounds, counts, then the arrays
+    rng = np.random.default_rng(seed)
+    positions, normals = vertex_pool(rng, vertices)
+    positions *= 0.01
+
+    header = struct.pack('<L', 1) + bytes(36 if is_track else 40)
+    header += struct.pack('<12f', 1, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0) + bytes(12)
+    header += struct.pack('<6f', *positions.min(axis=0), *positions.max(axis=0))
+    header += struct.pack('<LLLL', 0, 0, faces, vertices)
+
+    return (header +
+            positions.astype('<f4').tobytes() +
+            normals.astype('<f4').tobytes() +
+            rng.random((vertices, 2), dtype=np.float32).astype('<f4').tobytes() +
+            rng.integers(0, materials, faces).astype('<u4').tobytes() +
+            rng.integers(0, vertices, faces * 3).astype('<u4').tobytes())
+
+
+def tdo3_track(meshes=32, vertices=2000, faces=3000, seed=0):
+    # .mp, a mesh count then every object followed by 4 unknown bytes
+    objects = [tdo3_object(vertices, faces, is_track=True, seed=seed + i) + bytes(4) for i in range(meshes)]
+    return struct.pack('<L', meshes) + b''.join(objects)
+
+######################################################
+# LEVELS
+######################################################
+def strip_dat(strips=20000, positions=60000, seed=0):
+    # 20 byte header, strip records, then i16 positions
+    rng = np.random.default_rng(seed)
+    records = np.zeros(strips, dtype=td5.STRIP_DTYPE)
+    records['type'] = rng.choice([1, 2, 3, 4, 5, 6, 7, 9], strips)
+    records['materials'] = rng.integers(0, 256, strips)
+    records['flags'] = rng.integers(2, 6, strips) | 0x30
+    records['index1'] = rng.integers(0, positions - 16, strips)
+    records['index2'] = rng.integers(0, positions - 16, strips)
+    records['offset'] = rng.integers(-100000, 100000, (strips, 3))
+
+    points = rng.integers(-3000, 3000, (positions, 3)).astype('<i2')
+    strips_offset = 20
+    geo_offset = strips_offset + records.nbytes
+    header = struct.pack('<LLLLL', strips_offset, strips, geo_offset, positions, strips)
+    return header + records.tobytes() + points.tobytes()
+
+
+def models_dat(groups=16, per_group=16, make=None, seed=0):
+    # group table of (offset, size), each group is a model count, model
+    # offsets relative to the group, then the models
+    make = make or (lambda s: td5_model(submeshes=4, tris=100, quads=50, seed=s))
+
+    group_blobs = []
+    for g in range(groups):
+        models = [make(seed + g * per_group + i) for i in range(per_group)]
+        table_size = 4 + 4 * per_group
+        offsets = np.cumsum([table_size] + [len(m) for m in models[:-1]])
+        group_blobs.append(struct.pack('<L', per_group) + offsets.astype('<u4').tobytes() + b''.join(models))
+
+    table = bytearray(struct.pack('<L', groups))
+    position = 4 + 8 * groups
+    for blob in group_blobs:
+        table += struct.pack('<LL', position, len(blob))
+        position += len(blob)
+    return bytes(table) + b''.join(group_blobs)
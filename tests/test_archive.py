@@ -0,0 +1,43 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import struct
+
+import numpy as np
+
+from io_scene_td5.formats import archive
+
+
+def texture_record(flags, bgr, indices):
+    return (struct.pack('BB', *archive.TEXTURE_MAGIC) + struct.pack('<hL', flags, len(bgr)) +
+            np.asarray(bgr, dtype='u1').tobytes() + np.asarray(indices, dtype='u1').tobytes())
+
+
+def test_indices_past_the_palette_are_opaque_black():
+    indices = np.zeros((archive.TEXTURE_SIZE, archive.TEXTURE_SIZE), dtype=np.uint8)
+    indices[0, 0] = 1
+    indices[0, 1] = 200
+    texture = archive.read_texture(texture_record(0, [[0, 0, 255], [255, 0, 0]], indices), 0)
+
+    pixels = texture.decode()
+    assert pixels[0, 0].tolist() == [0, 0, 255, 255]
+    assert pixels[0, 1].tolist() == [0, 0, 0, 255]
+    assert pixels[1, 0].tolist() == [255, 0, 0, 255]
+
+
+def test_chroma_key_only_clears_black_palette_entries():
+    indices = np.zeros((archive.TEXTURE_SIZE, archive.TEXTURE_SIZE), dtype=np.uint8)
+    indices[0, 1] = 1
+    indices[0, 2] = 100
+    texture = archive.read_texture(texture_record(archive.TEXTURE_FLAG_CHROMA_KEY, [[0, 0, 0], [10, 20, 30]], indices), 0)
+
+    pixels = texture.decode()
+    assert pixels[0, 0, 3] == 0
+    assert pixels[0, 1].tolist() == [30, 20, 10, 255]
+    assert pixels[0, 2, 3] == 255
@@ -0,0 +1,75 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import numpy as np
+
+from io_scene_td5 import atlas, geometry
+
+
+def solid_texture(value, size=4):
+    texture = np.full((size, size, 4), value, dtype=np.uint8)
+    texture[0, 0] = 255 - value
+    return texture
+
+
+def quad_geometry(materials, uvs):
+    # one quad per material slot, all sharing the same corners
+    return geometry.MeshGeometry(vertices=np.zeros((4, 3), dtype=np.float32),
+                                 loop_vertices=np.tile(np.arange(4, dtype=np.int32), len(materials)),
+                                 face_sizes=np.full(len(materials), 4, dtype=np.int32),
+                                 face_materials=np.arange(len(materials), dtype=np.int32),
+                                 materials=list(materials),
+                                 loop_uvs=np.tile(np.asarray(uvs, dtype=np.float32), (len(materials), 1)))
+
+
+def test_tiles_are_placed_row_by_row_with_edge_padding():
+    textures = {texnum: solid_texture(10 * texnum + 10) for texnum in (3, 1, 2, 7, 5)}
+    level_atlas = atlas.build_atlas(textures, page_size=16, padding=2)
+
+    # 8 texel stride, 2 x 2 tiles per page
+    assert len(level_atlas.pages) == 2
+    assert level_atlas.tile_size == 4
+    assert level_atlas.placements == {1: (0, 2, 2), 2: (0, 10, 2), 3: (0, 2, 10), 5: (0, 10, 10), 7: (1, 2, 2)}
+
+    page = level_atlas.pages[0]
+    assert np.array_equal(page[10:14, 2:6], textures[3])
+    # padding repeats the edge texels
+    assert np.array_equal(page[0, 0], textures[1][0, 0])
+    assert np.array_equal(page[2, 6:8], [textures[1][0, 3]] * 2)
+
+
+def test_empty_atlas():
+    level_atlas = atlas.build_atlas({})
+    assert level_atlas.pages == [] and level_atlas.placements == {}
+
+
+def test_repeating_textures_are_found_by_their_uvs():
+    inside = quad_geometry([1, 2], [[0, 0], [1, 0], [1, 1], [0, 1]])
+    outside = quad_geometry([2, 3], [[0, 0], [2, 0], [2, 1], [0, 1]])
+    rounding = quad_geometry([4], [[-1e-4, 0], [1 + 1e-4, 0], [1, 1], [0, 1]])
+    assert atlas.repeating_textures([inside, outside, rounding]) == {2, 3}
+
+
+def test_apply_atlas_moves_uvs_into_the_tile():
+    textures = {5: solid_texture(50), 6: solid_texture(60)}
+    level_atlas = atlas.build_atlas(textures, page_size=16, padding=2)
+    geom = quad_geometry([6, 9, 5], [[0, 0], [1, 0], [1, 1], [0, 1]])
+
+    moved = atlas.apply_atlas(geom, level_atlas, ["Atlas_0"])
+
+    # both atlased slots share the page material, texture 9 keeps its own
+    assert moved.materials == ["Atlas_0", 9]
+    assert moved.face_materials.tolist() == [0, 1, 0]
+    assert np.allclose(moved.loop_uvs[4:8], geom.loop_uvs[4:8])
+
+    # texture 6 sits at texel (10, 2), V counts up from the bottom of the page
+    _, x, y = level_atlas.placements[6]
+    assert np.allclose(moved.loop_uvs[0], [x / 16, 1 - (y + 4) / 16])
+    assert np.allclose(moved.loop_uvs[2], [(x + 4) / 16, 1 - y / 16])
+    assert geom.materials == [6, 9, 5]
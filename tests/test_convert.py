@@ -0,0 +1,57 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import os
+
+import fixtures
+from io_scene_td5 import convert
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+
+def kinds(install_dir, output_dir):
+    items = convert.find_items(str(install_dir), str(output_dir), ".blend")
+    return {os.path.relpath(item["output"], str(output_dir)): item["kind"] for item in items}
+
+
+def test_packed_levels_are_classified_by_their_models(tmp_path):
+    install = tmp_path / "install"
+    write(str(install / "td5" / "levelinf.dat"), bytes(16))
+    write(str(install / "td5" / "models.dat"), fixtures.models_dat(groups=2, per_group=2))
+    write(str(install / "td6" / "levelinf.dat"), bytes(16))
+    write(str(install / "td6" / "models.dat"),
+          fixtures.models_dat(groups=2, per_group=2, make=lambda s: fixtures.td6_model(submeshes=2, vertices=8, triangles=4, is_track=True, seed=s)))
+
+    found = kinds(install, tmp_path / "out")
+    assert found["td5.blend"] == "td5_level"
+    assert found["td6.blend"] == "td6_level"
+
+
+def test_unpacked_td6_level_and_loose_models(tmp_path):
+    install = tmp_path / "install"
+    write(str(install / "level" / "models" / "0000.dat"), fixtures.td6_model(submeshes=1, vertices=8, triangles=4, is_track=True))
+    write(str(install / "cars" / "car.dat"), fixtures.td5_model(submeshes=1, tris=4, quads=2))
+    write(str(install / "cars" / "car6.dat"), fixtures.td6_model(submeshes=1, vertices=8, triangles=4))
+
+    found = kinds(install, tmp_path / "out")
+    assert found["level.blend"] == "td6_level"
+    assert found[os.path.join("cars", "car.blend")] == "td5_model"
+    assert found[os.path.join("cars", "car6.blend")] == "td6_model"
+
+
+def test_broken_models_dat_falls_back_to_td5(tmp_path):
+    level = tmp_path / "install" / "level"
+    write(str(level / "levelinf.dat"), bytes(16))
+    write(str(level / "models.dat"), b"")
+
+    assert kinds(tmp_path / "install", tmp_path / "out")["level.blend"] == "td5_level"
@@ -0,0 +1,37 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import numpy as np
+
+import fixtures
+from io_scene_td5 import decoding, model_cache
+from io_scene_td5.formats import archive
+
+
+def test_decode_pool_batches_match_serial_decoding(tmp_path):
+    models_path = str(tmp_path / "models.dat")
+    with open(models_path, 'wb') as file:
+        file.write(fixtures.models_dat(groups=3, per_group=5))
+
+    with archive.ModelsArchive(models_path) as models:
+        indices = list(range(len(models)))
+        serial = decoding.decode_td5_models(models, indices)
+
+        # one pool decodes every batch, like a time sliced level import
+        keys = [model_cache.make_key("test", i) for i in indices]
+        pooled = []
+        with decoding.DecodePool(models, 0.0, 2) as pool:
+            for batch in model_cache.decode_batches(None, keys, pool.decode, 4):
+                pooled += batch
+
+    assert len(pooled) == len(serial)
+    for (geom_a, location_a), (geom_b, location_b) in zip(serial, pooled):
+        assert np.array_equal(geom_a.vertices, geom_b.vertices)
+        assert np.array_equal(geom_a.loop_vertices, geom_b.loop_vertices)
+        assert location_a == location_b
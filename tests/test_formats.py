@@ -0,0 +1,157 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import io
+import struct
+
+import numpy as np
+import pytest
+
+import fixtures
+from io_scene_td5.formats import axes, td5, td6, tdo3
+
+
+def test_axes_go_from_game_centimetres_to_blender_metres():
+    assert np.allclose(axes.translate_vertices(np.array([[100, 200, 300]], dtype=np.float32)), [[1, -3, 2]])
+    assert axes.translate_vertex((100, 200, 300)) == (1.0, -3.0, 2.0)
+    assert np.allclose(axes.translate_normals(np.array([[1, 2, 3]], dtype=np.float32)), [[1, -3, 2]])
+    assert np.allclose(axes.translate_uvs(np.array([[0.25, 0.25]], dtype=np.float32)), [[0.25, 0.75]])
+    assert np.allclose(axes.translate_colors(np.array([[0, 51, 255, 255]], dtype=np.uint8)), [[0, 0.2, 1, 1]])
+
+
+def test_td5_model_matches_its_raw_records():
+    data = fixtures.td5_model(submeshes=2, tris=3, quads=2, seed=1)
+    model = td5.read_model(data)
+    record_count = 2 * (3 * 3 + 2 * 4)
+
+    assert model.texture_ids.tolist() == [0, 1]
+    assert model.tri_counts.tolist() == [3, 3]
+    assert model.quad_counts.tolist() == [2, 2]
+    assert len(model.vertices) == len(model.normals) == len(model.uvs) == record_count
+
+    vertex_offset = 64 + 2 * td5.SUBMESH_DTYPE.itemsize
+    normal_offset = vertex_offset + record_count * td5.VERTEX_DTYPE.itemsize
+    for i in (0, 7, record_count - 1):
+        x, y, z = struct.unpack_from('<fff', data, vertex_offset + i * 44)
+        u, v = struct.unpack_from('<ff', data, vertex_offset + i * 44 + 28)
+        color = struct.unpack_from('BBBB', data, vertex_offset + i * 44 + 40)
+        nx, ny, nz = struct.unpack_from('<fff', data, normal_offset + i * 16)
+
+        assert np.allclose(model.vertices[i], (x * 0.01, z * -0.01, y * 0.01))
+        assert np.allclose(model.uvs[i], (u, 1 - v))
+        assert np.allclose(model.colors[i], np.array(color) / 255)
+        assert np.allclose(model.normals[i], (nx, -ny, -nz))
+
+
+def test_td5_billboard_location_sits_below_the_center():
+    model = td5.read_model(fixtures.td5_model(submeshes=1, tris=1, quads=0))
+    # the fixture's bounding sphere has radius 20000 around the origin
+    assert np.allclose(model.billboard_location, (0, 0, -20000 * 0.65 * 0.01))
+
+
+def test_td6_model_reverses_winding_and_offsets_submeshes():
+    data = fixtures.td6_model(submeshes=2, vertices=5, triangles=4, seed=2)
+    model = td6.read_model(data)
+
+    assert model.texture_numbers.tolist() == [0, 1]
+    assert len(model.vertices) == 10
+    assert model.triangle_submeshes.tolist() == [0] * 4 + [1] * 4
+    assert model.colors is None and model.normals is not None
+
+    table = np.frombuffer(data, dtype=td6.SUBMESH_DTYPE, count=2, offset=52)
+    for s in range(2):
+        raw = np.frombuffer(data, dtype='<u2', count=12, offset=int(table[s]['index_offset'])).reshape(-1, 3)
+        assert np.array_equal(model.triangles[s * 4:(s + 1) * 4], raw[:, ::-1] + s * 5)
+
+    records = np.frombuffer(data, dtype=td6.VERTEX_DTYPE, count=5, offset=int(table[0]['vert_offset']))
+    assert np.allclose(model.vertices[:5], axes.translate_vertices(records['position']))
+    assert np.allclose(model.normals[:5], axes.translate_normals(records['normal']))
+
+
+def test_td6_track_model_has_colors_instead_of_normals():
+    data = fixtures.td6_model(submeshes=1, vertices=4, triangles=2, is_track=True, seed=3)
+    model = td6.read_model(data, is_track=True)
+    records = np.frombuffer(data, dtype=td6.TRACK_VERTEX_DTYPE, count=4, offset=52 + td6.SUBMESH_DTYPE.itemsize)
+
+    assert model.normals is None
+    assert np.allclose(model.colors, records['color'] / 255)
+    assert np.allclose(model.uvs[:, 1], 1 - records['uv'][:, 1])
+
+
+def test_td6_model_rejects_other_magic():
+    data = bytearray(fixtures.td6_model(submeshes=1, vertices=3, triangles=1))
+    struct.pack_into('<H', data, 0, td5.MODEL_MAGIC)
+    with pytest.raises(Exception, match="magic"):
+        td6.read_model(bytes(data))
+
+
+def test_td6_write_model_round_trips_records():
+    records = np.zeros(4, dtype=td6.VERTEX_DTYPE)
+    records['position'] = [[0, 0, 0], [100, 0, 0], [0, 100, 0], [0, 0, 100]]
+    records['normal'] = [[0, 1, 0]] * 4
+    records['uv'] = [[0, 0], [1, 0], [0, 1], [1, 1]]
+    indices = np.array([[0, 1, 2], [0, 2, 3], [1, 3, 2]])
+
+    file = io.BytesIO()
+    td6.write_model(file, [(9, records, indices)])
+    model = td6.read_model(file.getvalue())
+
+    assert model.texture_numbers.tolist() == [9]
+    assert np.array_equal(model.triangles, indices)
+    assert np.allclose(model.vertices, axes.translate_vertices(records['position']))
+    # the bounding sphere covers every vertex
+    center = np.array(model.center)
+    assert np.linalg.norm(records['position'] - center, axis=1).max() <= model.radius + 1e-3
+
+
+def test_tdo3_track_meshes_are_swapped_and_rewound():
+    data = fixtures.tdo3_track(meshes=3, vertices=6, faces=4, seed=4)
+    meshes = tdo3.read_track(data)
+    assert len(meshes) == 3
+
+    # first object: count, type, unknown data, matrix, bounds, counts
+    first = 4 + 4 + 36 + 48 + 12 + 40
+    raw_vertices = np.frombuffer(data, dtype='<f4', count=18, offset=first).reshape(-1, 3)
+    triangles_offset = first + 6 * (12 + 12 + 8) + 4 * 4
+    raw_triangles = np.frombuffer(data, dtype='<u4', count=12, offset=triangles_offset).reshape(-1, 3)
+
+    mesh = meshes[0]
+    assert np.allclose(mesh.vertices, np.column_stack((-raw_vertices[:, 0], -raw_vertices[:, 2], raw_vertices[:, 1])))
+    assert np.array_equal(mesh.triangles, raw_triangles[:, ::-1])
+    assert mesh.face_materials.shape == (4,)
+
+
+def test_tdo3_missing_objects_are_skipped():
+    data = struct.pack('<L', tdo3.NO_OBJECT) + fixtures.tdo3_object(vertices=3, faces=1)
+    mesh, offset = tdo3.read_object(data, 0, False)
+    assert mesh is None and offset == 4
+
+    mesh, offset = tdo3.read_object(data, offset, False)
+    assert len(mesh.vertices) == 3 and offset == len(data)
+
+
+def test_collision_rows_follow_the_strip_types():
+    data = fixtures.strip_dat(strips=12, positions=200, seed=5)
+    collision = td5.read_collision(data)
+    assert collision.positions.shape == (200, 3)
+    assert len(collision.strips) == 12
+
+    row_starts, row_counts, row_indices, row_offsets = td5.strip_rows(collision)
+    used = td5.used_strips(collision)
+    breadths = (collision.strips['flags'] & 0xF).astype(np.int64)
+    for x in range(12):
+        if not used[x]:
+            assert row_counts[x].tolist() == [0, 0]
+            continue
+        extend = td5.STRIP_INDEX_OFFSETS[collision.strips['type'][x]]
+        assert row_counts[x].tolist() == (breadths[x] + 1 + extend).tolist()
+        start = row_starts[x, 0]
+        first = int(collision.strips['index1'][x])
+        assert row_indices[start:start + row_counts[x, 0]].tolist() == list(range(first, first + row_counts[x, 0]))
+        assert (row_offsets[start:start + row_counts[x, 0]] == collision.strips['offset'][x]).all()
@@ -0,0 +1,125 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import numpy as np
+
+import fixtures
+from io_scene_td5 import geometry
+from io_scene_td5.formats import td5, tdo3
+
+
+def collision(strips, positions):
+    # strips are (type, breadth, index1, index2, offset)
+    records = np.zeros(len(strips), dtype=td5.STRIP_DTYPE)
+    for record, (strip_type, breadth, index1, index2, offset) in zip(records, strips):
+        record['type'] = strip_type
+        record['flags'] = breadth
+        record['index1'] = index1
+        record['index2'] = index2
+        record['offset'] = offset
+    return td5.TD5CollisionStrips(positions=np.asarray(positions, dtype='<i2'),
+                                  strips=records,
+                                  main_strip_count=len(strips) + 2)
+
+
+def simple_geometry(vertices, triangles, materials):
+    return geometry.MeshGeometry(vertices=np.asarray(vertices, dtype=np.float32),
+                                 loop_vertices=np.asarray(triangles, dtype=np.int32).ravel(),
+                                 face_sizes=np.full(len(triangles), 3, dtype=np.int32),
+                                 face_materials=np.zeros(len(triangles), dtype=np.int32),
+                                 materials=materials)
+
+
+def test_td5_model_faces_follow_the_submesh_counts():
+    model = td5.read_model(fixtures.td5_model(submeshes=2, tris=3, quads=2, seed=6))
+    geom = geometry.from_td5_model(model)
+
+    assert geom.face_sizes.tolist() == [3, 3, 3, 4, 4] * 2
+    assert geom.face_materials.tolist() == [0] * 5 + [1] * 5
+    assert geom.materials == [0, 1]
+    assert len(geom.loop_vertices) == len(geom.loop_uvs) == 34
+    # every corner still lands on its own position after welding
+    assert np.array_equal(geom.vertices[geom.loop_vertices], model.vertices[:34])
+    assert geom.welded == len(model.vertices) - len(geom.vertices)
+
+
+def test_strip_faces_cover_each_strip_type():
+    # (quads, triangles) for breadth 4, rows sized like td5.strip_rows makes them
+    expected = {1: (4, 0), 2: (3, 1), 3: (3, 1), 4: (2, 2), 5: (3, 1), 6: (3, 1), 7: (2, 2)}
+    for strip_type, (quads, triangles) in expected.items():
+        extend_a, extend_b = td5.STRIP_INDEX_OFFSETS[strip_type]
+        verts_a = list(range(0, 5 + extend_a))
+        verts_b = list(range(100, 105 + extend_b))
+        faces = geometry.strip_faces(strip_type, verts_a, verts_b, 4, 0b0101)
+
+        sizes = [len(corners) for corners, _ in faces]
+        assert (sizes.count(4), sizes.count(3)) == (quads, triangles), strip_type
+        used = {v for corners, _ in faces for v in corners}
+        assert used == set(verts_a) | set(verts_b), strip_type
+
+    # material bits pick a material per center quad
+    faces = geometry.strip_faces(1, list(range(5)), list(range(100, 105)), 4, 0b0101)
+    assert [material for _, material in faces] == [1, 0, 1, 0]
+
+
+def test_collision_strips_share_rows_with_the_same_offset():
+    positions = [[x * 10, 0, y * 10] for y in range(4) for x in range(3)]
+    strips = collision([(1, 2, 0, 3, (0, 0, 0)),
+                        (1, 2, 3, 6, (0, 0, 0)),
+                        (1, 2, 6, 9, (500, 0, 0))],
+                       positions)
+    geom = geometry.from_td5_collision(strips)
+
+    # rows 3-5 are shared by the first two strips, the third strip is moved
+    # so its first row doesn't share with the second strip's last
+    assert len(geom.vertices) == 6 + 3 + 6
+    assert geom.welded == 18 - 15
+    assert geom.face_sizes.tolist() == [4] * 6
+    first, second = geom.loop_vertices[:8].reshape(2, 4), geom.loop_vertices[8:16].reshape(2, 4)
+    assert set(first[:, 2:].ravel()) == set(second[:, :2].ravel())
+    # strip offsets are added in game units before the axis swap
+    assert np.allclose(geom.vertices[geom.loop_vertices[16]], [5.0, -0.2, 0.0])
+
+
+def test_merge_offsets_loops_and_shares_material_slots():
+    a = simple_geometry([[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[0, 1, 2]], [7])
+    b = simple_geometry([[0, 0, 0], [2, 0, 0], [0, 2, 0], [2, 2, 0]], [[0, 1, 2], [1, 3, 2]], [3])
+    b.face_materials[:] = [0, 0]
+    c = simple_geometry([[5, 5, 5], [6, 5, 5], [5, 6, 5]], [[2, 1, 0]], [7])
+
+    merged = geometry.merge_geometry([a, b, c], [None, (0, 0, 10), None], [100, 200, 300])
+
+    assert merged.materials == [7, 3]
+    assert merged.loop_vertices.tolist() == [0, 1, 2, 3, 4, 5, 4, 6, 5, 9, 8, 7]
+    assert merged.face_materials.tolist() == [0, 1, 1, 0]
+    assert np.allclose(merged.vertices[3:7], b.vertices + [0, 0, 10])
+    assert merged.face_attributes["model_offset"].tolist() == [100, 200, 200, 300]
+
+
+def test_merge_of_nothing_is_empty():
+    merged = geometry.merge_geometry([])
+    assert len(merged.vertices) == 0 and merged.materials == []
+
+
+def test_group_runs_and_completion_order():
+    runs = geometry.group_runs([4, 4, 1, 1, 1, 4])
+    assert [run.tolist() for run in runs] == [[0, 1], [2, 3, 4], [5]]
+    assert geometry.group_runs([]) == []
+
+    # chunks come out by the last model each needs
+    chunks = [[3, 9], [0, 1], [], [2, 4]]
+    assert geometry.completion_order(chunks) == [2, 1, 3, 0]
+
+
+def test_tdo3_mesh_without_faces_has_no_materials():
+    data = fixtures.tdo3_object(vertices=3, faces=0)
+    mesh, _ = tdo3.read_object(data, 0, False)
+    geom = geometry.from_tdo3_mesh(mesh)
+    assert geom.materials == []
+    assert len(geom.loop_vertices) == 0
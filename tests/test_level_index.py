@@ -0,0 +1,90 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import os
+
+import numpy as np
+
+import fixtures
+from io_scene_td5 import level_index
+from io_scene_td5.formats import archive
+
+
+def grid_index(cell_size=None):
+    # four unit boxes in a row along X, the last one spanning two units
+    box_min = [[0, 0, 0], [2, 0, 0], [4, 0, 0], [6, 0, 0]]
+    box_max = [[1, 1, 1], [3, 1, 1], [5, 1, 1], [8, 1, 1]]
+    return level_index.build_index(box_min, box_max, ["a", "b", "c", "d"], ["models.dat"] * 4, [0, 16, 32, 48], "sig", cell_size)
+
+
+def test_queries_match_a_brute_force_search():
+    index = grid_index(cell_size=1.5)
+    assert index.query_box([1.5, 0, 0], [4.5, 1, 1]).tolist() == [1, 2]
+    assert index.query_box([9, 0, 0], [10, 1, 1]).tolist() == []
+    assert index.query_radius([5.5, 0.5, 0.5], 0.6).tolist() == [2, 3]
+
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        low = rng.uniform(-1, 9, 3)
+        high = low + rng.uniform(0, 3, 3)
+        expected = np.flatnonzero(((index.box_min <= high) & (index.box_max >= low)).all(axis=1))
+        assert index.query_box(low, high).tolist() == expected.tolist()
+
+
+def test_cell_groups_cover_every_model_once():
+    index = grid_index(cell_size=2.5)
+    groups = index.cell_groups()
+    assert sorted(i for group in groups for i in group.tolist()) == [0, 1, 2, 3]
+    # box centers at x 0.5, 2.5, 4.5 and 7
+    assert [group.tolist() for group in groups] == [[0], [1, 2], [3]]
+
+
+def test_sidecar_round_trip(tmp_path):
+    index = grid_index()
+    path = str(tmp_path / level_index.INDEX_FILENAME)
+    level_index.save_index(path, index)
+    read = level_index.read_index(path)
+
+    assert read.signature == "sig"
+    assert read.cell_size == index.cell_size
+    for name in ("names", "sources", "offsets", "box_min", "box_max", "origin", "dims", "cell_starts", "cell_items"):
+        assert np.array_equal(getattr(read, name), getattr(index, name)), name
+    assert os.listdir(str(tmp_path)) == [level_index.INDEX_FILENAME]
+
+
+def test_sidecar_from_another_version_is_ignored(tmp_path, monkeypatch):
+    path = str(tmp_path / level_index.INDEX_FILENAME)
+    level_index.save_index(path, grid_index())
+    monkeypatch.setattr(level_index, "INDEX_VERSION", level_index.INDEX_VERSION + 1)
+    assert level_index.read_index(path) is None
+    assert level_index.read_index(str(tmp_path / "missing.npz")) is None
+
+
+def test_level_index_is_rebuilt_when_models_change(tmp_path, monkeypatch):
+    models_path = str(tmp_path / "models.dat")
+    with open(models_path, 'wb') as file:
+        file.write(fixtures.models_dat(groups=2, per_group=3))
+
+    index = level_index.load_level_index('TD5', str(tmp_path))
+    assert len(index) == 6
+    with archive.ModelsArchive(models_path) as models:
+        assert index.offsets.tolist() == models.model_offsets.tolist()
+    assert os.path.isfile(level_index.index_path(str(tmp_path)))
+
+    # unchanged models read the sidecar back
+    def entries(*args):
+        raise AssertionError("the level was indexed again")
+    with monkeypatch.context() as patch:
+        patch.setattr(level_index, "level_entries", entries)
+        assert len(level_index.load_level_index('TD5', str(tmp_path))) == 6
+
+    with open(models_path, 'wb') as file:
+        file.write(fixtures.models_dat(groups=1, per_group=2))
+    os.utime(models_path, ns=(0, 0))
+    assert len(level_index.load_level_index('TD5', str(tmp_path))) == 2
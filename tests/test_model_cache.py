@@ -0,0 +1,80 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import os
+
+import numpy as np
+
+import fixtures
+from io_scene_td5 import geometry, model_cache
+from io_scene_td5.formats import td5
+
+
+def cached_model():
+    model = td5.read_model(fixtures.td5_model(submeshes=2, tris=20, quads=10))
+    return geometry.from_td5_model(model), (1.0, 2.0, 3.0)
+
+
+def test_put_then_get_returns_identical_arrays(tmp_path):
+    cache = model_cache.GeometryCache(str(tmp_path), 1 << 20)
+    geom, location = cached_model()
+    cache.put("key", geom, location)
+
+    read, read_location = cache.get("key")
+    assert read_location == location
+    assert read.materials == geom.materials
+    assert read.welded == geom.welded
+    for name in ("vertices", "loop_vertices", "face_sizes", "face_materials", "loop_uvs"):
+        expected = getattr(geom, name)
+        actual = getattr(read, name)
+        assert actual.dtype == expected.dtype
+        assert np.array_equal(actual, expected)
+
+
+def test_missing_entry_is_a_miss(tmp_path):
+    cache = model_cache.GeometryCache(str(tmp_path), 1 << 20)
+    assert cache.get("missing") is None
+
+
+def test_corrupt_entry_is_a_miss_and_removed(tmp_path):
+    cache = model_cache.GeometryCache(str(tmp_path), 1 << 20)
+    geom, location = cached_model()
+    cache.put("truncated", geom, location)
+    path = cache.entry_path("truncated")
+    with open(path, 'rb') as file:
+        data = file.read()
+    with open(path, 'wb') as file:
+        file.write(data[:len(data) // 2])
+
+    with open(cache.entry_path("garbage"), 'wb') as file:
+        file.write(b"PK\x03\x04 not a zip")
+
+    assert cache.get("truncated") is None
+    assert cache.get("garbage") is None
+    assert not os.path.exists(path)
+    assert not os.path.exists(cache.entry_path("garbage"))
+
+
+def test_decode_batches_only_decodes_misses(tmp_path):
+    cache = model_cache.GeometryCache(str(tmp_path), 1 << 20)
+    geom, location = cached_model()
+    decoded = []
+
+    def decode(indices):
+        decoded.extend(indices)
+        return [(geom, location)] * len(indices)
+
+    keys = ["a", "b", "c"]
+    cache.put("b", geom, location)
+    results = model_cache.decode_cached(cache, keys, decode)
+    assert decoded == [0, 2]
+    assert len(results) == 3
+
+    model_cache.decode_cached(cache, keys, decode)
+    assert decoded == [0, 2]
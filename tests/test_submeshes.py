@@ -0,0 +1,105 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import io
+
+import numpy as np
+
+from io_scene_td5 import submeshes
+from io_scene_td5.formats import axes, td6
+
+from test_vertex_cache import grid_triangles
+
+
+def grid_mesh(width=12, height=10):
+    # a flat grid in game units, every triangle corner is its own loop like
+    # a triangulated Blender mesh. materials alternate per row
+    xs, zs = np.meshgrid(np.arange(width + 1), np.arange(height + 1))
+    positions = np.column_stack((xs.ravel() * 100.0, np.zeros(xs.size), zs.ravel() * 100.0)).astype(np.float32)
+    normals = np.tile(np.array([0.0, 1.0, 0.0], dtype=np.float32), (len(positions), 1))
+
+    triangles = grid_triangles(width, height)
+    loop_verts = triangles.ravel().astype(np.int32)
+    triangle_loops = np.arange(len(loop_verts)).reshape(-1, 3)
+    loop_uvs = (positions[loop_verts][:, [0, 2]] / 1000.0).astype(np.float32)
+    triangle_materials = (np.arange(len(triangles)) // (2 * width)) % 2
+    return triangles, triangle_loops, triangle_materials, loop_verts, positions, normals, loop_uvs
+
+
+def canonical(triangle):
+    # same triangle with the same winding compares equal
+    i = triangle.index(min(triangle))
+    return triangle[i:] + triangle[:i]
+
+
+def round_trip(max_vertices=submeshes.MAX_SUBMESH_VERTICES):
+    triangles, triangle_loops, triangle_materials, loop_verts, positions, normals, loop_uvs = grid_mesh()
+    built, acmr_before, acmr_after = submeshes.build_submeshes(triangle_loops, triangle_materials, [17, 42],
+                                                              loop_verts, positions, loop_uvs, normals,
+                                                              max_vertices=max_vertices)
+    file = io.BytesIO()
+    td6.write_model(file, built)
+    model = td6.read_model(file.getvalue())
+
+    # map read vertices back to grid vertices by position
+    grid_index = {tuple(p): i for i, p in enumerate(axes.translate_vertices(positions).tolist())}
+    read_index = np.array([grid_index[tuple(p)] for p in model.vertices.tolist()])
+    read_triangles = read_index[model.triangles]
+    texture_numbers = model.texture_numbers[model.triangle_submeshes]
+
+    expected = {canonical(tuple(t)): [17, 42][m] for t, m in zip(triangles.tolist(), triangle_materials.tolist())}
+    found = {canonical(tuple(t)): n for t, n in zip(read_triangles.tolist(), texture_numbers.tolist())}
+    return built, expected, found, acmr_before, acmr_after
+
+
+def test_round_trip_keeps_triangles_winding_and_textures():
+    built, expected, found, acmr_before, acmr_after = round_trip()
+    assert len(built) == 2
+    assert found == expected
+    assert acmr_after <= acmr_before
+
+
+def test_round_trip_split_submeshes():
+    built, expected, found, _, _ = round_trip(max_vertices=20)
+    assert len(built) > 2
+    assert all(len(records) <= 20 for _, records, _ in built)
+    assert all(indices.max() < len(records) for _, records, indices in built)
+    assert found == expected
+
+
+def test_split_at_16_bit_index_limit():
+    # disjoint triangles, 66000 vertices don't fit one submesh
+    triangle_count = 22000
+    loop_verts = np.arange(triangle_count * 3, dtype=np.int32)
+    positions = np.random.default_rng(0).random((len(loop_verts), 3)).astype(np.float32)
+    built, _, _ = submeshes.build_submeshes(loop_verts.reshape(-1, 3), np.zeros(triangle_count, dtype=np.int64), [0],
+                                            loop_verts, positions, np.zeros((len(loop_verts), 2), dtype=np.float32),
+                                            np.zeros_like(positions))
+    assert len(built) == 2
+    assert all(len(records) <= 0xFFFF for _, records, _ in built)
+    assert sum(len(indices) for _, _, indices in built) == triangle_count
+
+
+def test_split_triangles_ranges():
+    triangles = np.arange(30).reshape(-1, 3)
+    ranges = submeshes.split_triangles(triangles, 7)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(triangles)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(len(np.unique(triangles[start:end])) <= 7 for start, end in ranges)
+    # ranges are only cut when the next triangle wouldn't fit
+    assert all(len(np.unique(triangles[start:end + 1])) > 7 for start, end in ranges[:-1])
+
+
+def test_split_triangles_shared_vertices():
+    triangles = np.random.default_rng(2).integers(0, 50, (400, 3))
+    ranges = submeshes.split_triangles(triangles, 40)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(triangles)
+    assert all(len(np.unique(triangles[start:end])) <= 40 for start, end in ranges)
+    assert all(len(np.unique(triangles[start:end + 1])) > 40 for start, end in ranges[:-1])
+    assert submeshes.split_triangles(np.zeros((0, 3), dtype=np.int64)) == []
@@ -0,0 +1,84 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import os
+import stat
+import sys
+
+import pytest
+
+from io_scene_td5 import utils
+
+# stands in for Blender, writes a summary of the arguments after "--"
+FAKE_BLENDER = '''#!%s
+import json, sys
+args = sys.argv[sys.argv.index("--") + 1:]
+if "--crash" in args:
+    sys.exit(3)
+with open(args[args.index("--summary") + 1], 'w') as file:
+    json.dump({"objects": [{"args": args[:-2]}]}, file)
+'''
+
+
+def test_atomic_path_swaps_in_the_new_file(tmp_path):
+    path = str(tmp_path / "out.glb")
+    with open(path, 'w') as file:
+        file.write("old")
+
+    with utils.atomic_path(path) as temp_path:
+        assert temp_path.endswith(".glb") and temp_path != path
+        with open(temp_path, 'w') as file:
+            file.write("new")
+        with open(path) as file:
+            assert file.read() == "old"
+
+    with open(path) as file:
+        assert file.read() == "new"
+    assert os.listdir(str(tmp_path)) == ["out.glb"]
+
+
+def test_atomic_path_keeps_the_old_file_on_errors(tmp_path):
+    path = str(tmp_path / "out.npz")
+    with open(path, 'w') as file:
+        file.write("old")
+
+    with pytest.raises(RuntimeError):
+        with utils.atomic_path(path) as temp_path:
+            with open(temp_path, 'w') as file:
+                file.write("partial")
+            raise RuntimeError()
+
+    with open(path) as file:
+        assert file.read() == "old"
+    assert os.listdir(str(tmp_path)) == ["out.npz"]
+
+
+def test_parse_script_args_skips_blender_arguments():
+    parser = utils.script_parser("test", "test", "output")
+    args = utils.parse_script_args(parser, ["blender", "--background", "--", "--output", "out", "--jobs", "3"])
+    assert (args.output, args.jobs, args.summary) == ("out", 3, None)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="the fake Blender is a shebang script")
+def test_run_jobs_collects_summaries_and_failures(tmp_path):
+    blender = tmp_path / "blender"
+    blender.write_text(FAKE_BLENDER % sys.executable)
+    blender.chmod(blender.stat().st_mode | stat.S_IEXEC)
+
+    def job_args(i, job, temp_dir):
+        assert os.path.isdir(temp_dir)
+        return ["--job", str(i)] + (["--crash"] if job == "crash" else [])
+
+    def failed_entries(job, message):
+        return [{"job": job, "error": message}]
+
+    results = utils.run_jobs(str(blender), "script.py", ["a", "crash", "b"], job_args, "objects", failed_entries)
+    assert results == [{"args": ["--job", "0"]},
+                       {"job": "crash", "error": "Blender exited with code 3"},
+                       {"args": ["--job", "2"]}]
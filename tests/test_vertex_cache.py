@@ -0,0 +1,65 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import numpy as np
+
+from io_scene_td5 import vertex_cache
+
+
+def grid_triangles(width, height):
+    # two triangles per cell of a width x height grid, row by row
+    triangles = []
+    for y in range(height):
+        for x in range(width):
+            a = y * (width + 1) + x
+            b, c, d = a + 1, a + width + 1, a + width + 2
+            triangles += [(a, b, d), (a, d, c)]
+    return np.array(triangles, dtype=np.int64)
+
+
+def random_triangles(vertex_count, triangle_count, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, vertex_count, (triangle_count, 3))
+
+
+def test_tipsify_is_a_permutation_that_does_not_raise_acmr():
+    for triangles, vertex_count in ((grid_triangles(30, 30), 31 * 31),
+                                    (random_triangles(500, 2000), 500),
+                                    (grid_triangles(1, 1), 4)):
+        order = vertex_cache.tipsify(triangles, vertex_count)
+        assert sorted(order.tolist()) == list(range(len(triangles)))
+        assert vertex_cache.acmr(triangles[order]) <= vertex_cache.acmr(triangles)
+
+
+def test_tipsify_improves_a_shuffled_grid():
+    triangles = grid_triangles(40, 40)
+    shuffled = triangles[np.random.default_rng(1).permutation(len(triangles))]
+    order = vertex_cache.tipsify(shuffled, 41 * 41)
+    assert vertex_cache.acmr(shuffled[order]) < 0.5 * vertex_cache.acmr(shuffled)
+
+
+def test_tipsify_empty():
+    assert len(vertex_cache.tipsify(np.zeros((0, 3), dtype=np.int64), 0)) == 0
+    assert vertex_cache.acmr(np.zeros((0, 3), dtype=np.int64)) == 0.0
+
+
+def test_acmr_counts_fifo_misses():
+    # the second triangle reuses two cached vertices
+    assert vertex_cache.acmr([(0, 1, 2), (2, 1, 3)], cache_size=16) == 2.0
+    # with a 3 entry FIFO cache vertex 3 evicts 0, and reloading 0, 1 and 2
+    # then evicts each of them in turn
+    assert vertex_cache.acmr([(0, 1, 2), (1, 2, 3), (0, 1, 2)], cache_size=3) == 7 / 3
+
+
+def test_first_use_order_renumbers_and_drops_unused():
+    triangles = np.array([(7, 3, 5), (5, 3, 9)])
+    remapped, old = vertex_cache.first_use_order(triangles, 10)
+    assert old.tolist() == [7, 3, 5, 9]
+    assert remapped.tolist() == [[0, 1, 2], [2, 1, 3]]
+    assert (old[remapped] == triangles).all()
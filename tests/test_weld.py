@@ -0,0 +1,57 @@
+# ##### BEGIN LICENSE BLOCK #####
+#
+# This program is licensed under Creative Commons BY-NC-SA:
+# https://creativecommons.org/licenses/by-nc-sa/3.0/
+#
+# Created by Dummiesman, 2021-2025
+#
+# ##### END LICENSE BLOCK #####
+
+import numpy as np
+
+from io_scene_td5 import weld
+
+
+def test_welded_vertices_keep_first_seen_order():
+    positions = np.array([[5, 0, 0], [1, 0, 0], [5, 0, 0], [3, 0, 0], [1, 0, 0]], dtype=np.float32)
+    unique, remap, merged = weld.weld_vertices(positions)
+
+    assert unique.tolist() == [0, 1, 3]
+    assert remap.tolist() == [0, 1, 0, 2, 1]
+    assert merged == 2
+    assert np.array_equal(positions[unique][remap], positions)
+
+
+def test_different_normals_do_not_weld():
+    positions = np.zeros((3, 3), dtype=np.float32)
+    normals = np.array([[0, 0, 1], [0, 1, 0], [0, 0, 1]], dtype=np.float32)
+    unique, remap, merged = weld.weld_vertices(positions, normals)
+
+    assert unique.tolist() == [0, 1]
+    assert remap.tolist() == [0, 1, 0]
+    assert merged == 1
+
+
+def test_tolerance_welds_within_a_grid_cell():
+    # positions snap to the nearest multiple of the tolerance, so 0.26 and
+    # 0.74 weld while 0.24 and 0.26 sit either side of a cell edge
+    positions = np.zeros((5, 3), dtype=np.float32)
+    positions[:, 0] = [0.0, 0.24, 0.26, 0.74, 0.76]
+    unique, remap, merged = weld.weld_vertices(positions, tolerance=0.5)
+
+    assert unique.tolist() == [0, 2, 4]
+    assert remap.tolist() == [0, 0, 1, 1, 2]
+    assert merged == 2
+
+
+def test_zero_tolerance_only_welds_exact_duplicates():
+    positions = np.array([[0, 0, 0], [0, 0, 1e-6], [0, 0, 0]], dtype=np.float32)
+    unique, remap, merged = weld.weld_vertices(positions, tolerance=0.0)
+
+    assert remap.tolist() == [0, 1, 0]
+    assert merged == 1
+
+
+def test_empty_input():
+    unique, remap, merged = weld.weld_vertices(np.zeros((0, 3), dtype=np.float32))
+    assert len(unique) == 0 and len(remap) == 0 and merged == 0